@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+import logging
+
+from rolling import replication_lag
+
+logger = logging.getLogger(__name__)
+
+# Thresholds based on the WiredTiger eviction defaults
+# (eviction_dirty_trigger=20%, eviction_trigger=95%)
+DIRTY_RATIO_THRESHOLD = 0.2
+USED_RATIO_THRESHOLD = 0.95
+TICKETS_AVAILABLE_THRESHOLD = 0.1
+REPLICATION_LAG_THRESHOLD = 10
+DISK_USAGE_THRESHOLD = 0.8
+MIN_MEMBERS = 3
+
+
+def _cache(server_status: dict) -> dict:
+    return server_status.get("wiredTiger", {}).get("cache", {})
+
+
+def _tickets_available_ratio(server_status: dict, ticket: str):
+    transactions = server_status.get("wiredTiger", {}).get("concurrentTransactions", {})
+    tickets = transactions.get(ticket, {})
+    if not tickets.get("totalTickets"):
+        return None
+    return tickets["available"] / tickets["totalTickets"]
+
+
+def summarize_member(samples: list) -> dict:
+    """
+    Summarize the samples taken from a member
+
+    :param: samples:    List of dictionaries with the "server_status",
+                        "repl_status" and "db_stats" of the member
+
+    :return:            Metrics of the member
+    """
+    statuses = [s["server_status"] for s in samples if s.get("server_status")]
+    if not statuses:
+        return {}
+    first, last = statuses[0], statuses[-1]
+
+    used_ratios = []
+    dirty_ratios = []
+    for status in statuses:
+        cache = _cache(status)
+        maximum = cache.get("maximum bytes configured")
+        if maximum:
+            used_ratios.append(cache.get("bytes currently in the cache", 0) / maximum)
+            dirty_ratios.append(
+                cache.get("tracked dirty bytes in the cache", 0) / maximum
+            )
+
+    elapsed = max(
+        (last.get("uptimeMillis", 0) - first.get("uptimeMillis", 0)) / 1000, 1
+    )
+    app_evictions = _cache(last).get(
+        "pages evicted by application threads", 0
+    ) - _cache(first).get("pages evicted by application threads", 0)
+    operations = sum(last.get("opcounters", {}).values()) - sum(
+        first.get("opcounters", {}).values()
+    )
+    writes = sum(
+        last.get("opcounters", {}).get(op, 0) - first.get("opcounters", {}).get(op, 0)
+        for op in ["insert", "update", "delete"]
+    )
+
+    metrics = {
+        "cache-used-ratio": round(max(used_ratios, default=0), 3),
+        "cache-dirty-ratio": round(max(dirty_ratios, default=0), 3),
+        "app-evictions-per-sec": round(app_evictions / elapsed, 2),
+        "ops-per-sec": round(operations / elapsed, 2),
+        "write-ratio": round(writes / operations, 3) if operations else 0,
+    }
+    for ticket in ["read", "write"]:
+        ratios = [_tickets_available_ratio(s, ticket) for s in statuses]
+        ratios = [r for r in ratios if r is not None]
+        if ratios:
+            metrics[f"{ticket}-tickets-available-ratio"] = round(min(ratios), 3)
+
+    lags = [replication_lag(s["repl_status"]) for s in samples if s.get("repl_status")]
+    lags = [lag for lag in lags if lag is not None]
+    if lags:
+        metrics["replication-lag-secs"] = max(lags)
+
+    db_stats = next(
+        (s["db_stats"] for s in reversed(samples) if s.get("db_stats")), None
+    )
+    if db_stats and db_stats.get("fsTotalSize"):
+        metrics["disk-usage-ratio"] = round(
+            db_stats["fsUsedSize"] / db_stats["fsTotalSize"], 3
+        )
+    return metrics
+
+
+def recommend(
+    metrics_by_member: dict, members_count: int, standalone: bool = False
+) -> list:
+    """
+    Scaling recommendations for the cluster
+
+    :param: metrics_by_member:  Dictionary with the metrics of each member
+    :param: members_count:      Number of members of the replica set
+    :param: standalone:         Whether mongod runs as a standalone, in which
+                                case adding members is not an option
+
+    :return:                    List of recommendations
+    """
+    recommendations = []
+
+    def members_where(condition):
+        return sorted(
+            member
+            for member, metrics in metrics_by_member.items()
+            if metrics and condition(metrics)
+        )
+
+    if not standalone and members_count < MIN_MEMBERS:
+        recommendations.append(
+            f"add members: the replica set has {members_count} members, "
+            f"at least {MIN_MEMBERS} are needed to survive a member failure"
+        )
+
+    cache_pressure = members_where(
+        lambda m: m["cache-dirty-ratio"] >= DIRTY_RATIO_THRESHOLD
+        or (
+            m["cache-used-ratio"] >= USED_RATIO_THRESHOLD and m["app-evictions-per-sec"]
+        )
+    )
+    if cache_pressure:
+        recommendations.append(
+            "raise the mem constraint of the application and wt_cache_size_gb: "
+            f"cache under eviction pressure on {', '.join(cache_pressure)}"
+        )
+
+    read_tickets = members_where(
+        lambda m: m.get("read-tickets-available-ratio", 1) < TICKETS_AVAILABLE_THRESHOLD
+    )
+    if read_tickets:
+        recommendations.append(
+            ("" if standalone else "add members and send reads to secondaries, or ")
+            + "raise wt_read_tickets if there are idle cores: "
+            f"read tickets exhausted on {', '.join(read_tickets)}"
+        )
+
+    write_tickets = members_where(
+        lambda m: m.get("write-tickets-available-ratio", 1)
+        < TICKETS_AVAILABLE_THRESHOLD
+    )
+    if write_tickets:
+        if cache_pressure:
+            recommendations.append(
+                "shard: write tickets exhausted while the cache is under pressure "
+                f"on {', '.join(write_tickets)}, the write load does not fit "
+                "a single replica set"
+            )
+        else:
+            recommendations.append(
+                "raise wt_write_tickets or the CPU limit: write tickets exhausted "
+                f"on {', '.join(write_tickets)}"
+            )
+
+    lagging = members_where(
+        lambda m: m.get("replication-lag-secs", 0) > REPLICATION_LAG_THRESHOLD
+    )
+    if lagging:
+        recommendations.append(
+            "use faster storage or enable separate_journal: replication lag "
+            f"above {REPLICATION_LAG_THRESHOLD}s on {', '.join(lagging)}"
+        )
+
+    disk_full = members_where(
+        lambda m: m.get("disk-usage-ratio", 0) >= DISK_USAGE_THRESHOLD
+    )
+    if disk_full:
+        recommendations.append(
+            f"add storage: disk usage above {int(DISK_USAGE_THRESHOLD * 100)}% "
+            f"on {', '.join(disk_full)}"
+        )
+
+    return recommendations
@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 
+import json
 import logging
+import time
 
 from ops.charm import CharmBase, CharmEvents
 
@@ -10,24 +12,46 @@ from ops.main import main
 from ops.model import (
     ActiveStatus,
     BlockedStatus,
+    MaintenanceStatus,
     WaitingStatus,
 )
 from oci_image import OCIImageResource, OCIImageResourceError
 
-from pod_spec import make_pod_spec
+from pod_spec import make_pod_spec, make_pod_scheduling, MAINTENANCE_FILE
 from cluster import MongoDBCluster
 from mongo import MongoConnector
+from k8s import K8sConnector
+from rolling import member_uri, rolling_apply, wait_for_member
+from profiler import aggregate_profile
+from loadgen import run_load_test
+from advisor import recommend, summarize_member
+from prewarm import prewarm
 
 
 logger = logging.getLogger(__name__)
 
 REQUIRED_SETTINGS = ["standalone"]
 REQUIRED_SETTINGS_NOT_STANDALONE = ["replica_set_name"]
+SCHEDULING_POLICIES = ["none", "preferred", "required"]
 
 # We expect the mongodb container to use the
 # default ports
 MONGODB_PORT = 27017
 
+# Port for mongod when started as a standalone for maintenance
+MAINTENANCE_PORT = 27018
+
+# Default slow operation threshold of mongod
+DEFAULT_SLOWMS = 100
+
+# WiredTiger ticket type -> server parameter
+WT_TICKET_PARAMETERS = {
+    "read": "wiredTigerConcurrentReadTransactions",
+    "write": "wiredTigerConcurrentWriteTransactions",
+}
+# Default number of read and write tickets of mongod
+DEFAULT_WT_TICKETS = 128
+
 
 class MongoDBStartedEvent(EventBase):
     pass
@@ -64,6 +88,10 @@ class MongoDBCharm(CharmBase):
 
         self.state.set_default(started=False)
         self.state.set_default(pod_spec=None)
+        self.state.set_default(update_strategy="RollingUpdate")
+        self.state.set_default(pod_scheduling_applied=False)
+        self.state.set_default(member_tags_applied=False)
+        self.state.set_default(wt_tickets_applied=[])
 
         self.port = MONGODB_PORT
         self.image = OCIImageResource(self, "mongodb-image")
@@ -72,6 +100,8 @@ class MongoDBCharm(CharmBase):
         self.framework.observe(self.on.install, self.configure_pod)
         self.framework.observe(self.on.config_changed, self.configure_pod)
         self.framework.observe(self.on.upgrade_charm, self.configure_pod)
+        self.framework.observe(self.on.journal_storage_attached, self.configure_pod)
+        self.framework.observe(self.on.logs_storage_attached, self.configure_pod)
         self.framework.observe(self.on.start, self.on_start)
         self.framework.observe(self.on.update_status, self.on_update_status)
 
@@ -84,6 +114,15 @@ class MongoDBCharm(CharmBase):
         # Cluster Events
         self.framework.observe(self.on.mongodb_started, self.on_mongodb_started)
 
+        # Actions
+        self.framework.observe(self.on.set_profiler_action, self.on_set_profiler)
+        self.framework.observe(self.on.profile_report_action, self.on_profile_report)
+        self.framework.observe(self.on.reset_profiler_action, self.on_reset_profiler)
+        self.framework.observe(self.on.build_index_action, self.on_build_index)
+        self.framework.observe(self.on.load_test_action, self.on_load_test)
+        self.framework.observe(self.on.recommend_scale_action, self.on_recommend_scale)
+        self.framework.observe(self.on.compact_action, self.on_compact)
+
         logger.debug("MongoDBCharm initialized!")
 
     # #############################################
@@ -118,6 +157,23 @@ class MongoDBCharm(CharmBase):
             image_info,
             self.port,
             replica_set_name=self.replica_set_name if not self.standalone else None,
+            maintenance_port=MAINTENANCE_PORT if not self.standalone else None,
+            host_tuning=self.model.config["host_tuning"],
+            numa_interleave=self.model.config["numa_interleave"],
+            max_open_files=self.model.config["max_open_files"],
+            max_processes=self.model.config["max_processes"],
+            journal_path=(
+                self._storage_location("journal")
+                if self.model.config["separate_journal"]
+                else None
+            ),
+            log_path=(
+                self._storage_location("logs")
+                if self.model.config["separate_logs"]
+                else None
+            ),
+            max_connections=self.model.config["max_connections"],
+            wt_cache_size_gb=self.model.config["wt_cache_size_gb"],
         )
 
         # Update pod spec if the generated one is different
@@ -148,11 +204,27 @@ class MongoDBCharm(CharmBase):
 
     # hooks: update-status
     def on_update_status(self, event):
+        # With rolling restarts, the pods are restarted by the leader
+        # instead of by Kubernetes. The StatefulSet might not exist yet,
+        # so this is retried on every update-status until it succeeds.
+        if self.unit.is_leader() and not self._configure_update_strategy():
+            self.unit.status = BlockedStatus(
+                "Error setting the StatefulSet update strategy"
+            )
+            return
+        if self.unit.is_leader() and not self._configure_pod_scheduling():
+            self.unit.status = BlockedStatus(
+                "Error setting the StatefulSet pod scheduling"
+            )
+            return
+
         status_message = ""
         if self.standalone:
             status_message += "standalone-mode: "
             if MongoConnector.ready(self.standalone_uri):
                 status_message += "ready"
+                if self.unit.is_leader() and not self._configure_tickets():
+                    status_message += " (WiredTiger tickets not applied)"
                 self.unit.status = ActiveStatus(status_message)
             else:
                 status_message += "service not ready yet"
@@ -163,8 +235,13 @@ class MongoDBCharm(CharmBase):
                 status_message += "ready"
                 if self.unit.is_leader():
                     if self.cluster.ready:
+                        if self.rolling_restart and not self._rolling_restart():
+                            return
+                        self._configure_member_tags()
                         hosts_count = len(self.cluster.replica_set_hosts)
                         status_message += f" ({hosts_count} members)"
+                        if not self._configure_tickets():
+                            status_message += " (WiredTiger tickets not applied)"
                     else:
                         status_message += " (replica set not initialized yet)"
                         # Since on_start is not being properly triggered,
@@ -197,6 +274,7 @@ class MongoDBCharm(CharmBase):
                 self.replica_set_name,
                 increase_version=True,
                 config=config,
+                tags=self._member_tags(),
             )
             MongoConnector.replset_reconfigure(uri, config)
             self.on.replica_set_configured.emit(self.cluster.hosts)
@@ -214,7 +292,7 @@ class MongoDBCharm(CharmBase):
         if not self.cluster.replica_set_initialized:
             self.unit.status = WaitingStatus("Initializing the replica set")
             config = MongoConnector.replset_generate_config(
-                self.cluster.hosts, self.replica_set_name
+                self.cluster.hosts, self.replica_set_name, tags=self._member_tags()
             )
             MongoConnector.replset_initialize(self.standalone_uri, config)
             self.on.replica_set_configured.emit(self.cluster.hosts)
@@ -222,6 +300,204 @@ class MongoDBCharm(CharmBase):
         self.on.cluster_ready.emit()
         logger.debug("Running on_mongodb_started finished")
 
+    # #############################################
+    # ########### ACTION HANDLERS #################
+    # #############################################
+
+    # actions: set-profiler
+    def on_set_profiler(self, event):
+        level = event.params["level"]
+        slowms = event.params["slowms"]
+        results = self._set_profiling_level(event.params["database"], level, slowms)
+        if results is None:
+            event.fail("cannot set the profiling level")
+            return
+        event.set_results(results)
+
+    # actions: profile-report
+    def on_profile_report(self, event):
+        entries_by_member = {}
+        for member in self.members:
+            uri = member_uri(member)
+            entries = []
+            for database in self._profiled_databases(uri, event.params["database"]):
+                entries += MongoConnector.get_profile_entries(
+                    uri, database, event.params["limit"]
+                )
+            entries_by_member[member] = entries
+
+        report = aggregate_profile(
+            entries_by_member,
+            top=event.params["top"],
+            examined_ratio=event.params["examined-ratio"],
+        )
+        event.set_results(
+            {
+                "entries": sum(len(e) for e in entries_by_member.values()),
+                "shapes": {
+                    str(rank): stats for rank, stats in enumerate(report, start=1)
+                },
+            }
+        )
+
+    # actions: reset-profiler
+    def on_reset_profiler(self, event):
+        results = self._set_profiling_level(event.params["database"], 0, DEFAULT_SLOWMS)
+        if results is None:
+            event.fail("cannot reset the profiling level")
+            return
+        event.set_results(results)
+
+    # actions: build-index
+    def on_build_index(self, event):
+        try:
+            keys = json.loads(event.params["keys"], object_pairs_hook=list)
+        except ValueError:
+            event.fail("keys must be a JSON document")
+            return
+        database = event.params["database"]
+        collection = event.params["collection"]
+        options = {"unique": event.params["unique"]}
+        if event.params["name"]:
+            options["name"] = event.params["name"]
+
+        # A rolling build of a unique index is only consistent if the
+        # writes to the collection are stopped during the whole procedure,
+        # so unique indexes are built with a regular createIndexes instead
+        if self.standalone or options["unique"]:
+            uri = self.standalone_uri if self.standalone else self.replica_set_uri
+            name = MongoConnector.create_index(
+                uri, database, collection, keys, **options
+            )
+            if not name:
+                event.fail("cannot build the index")
+                return
+            event.set_results({self.model.app.name: f"index {name} built"})
+            return
+
+        def build_index(member):
+            event.log(f"{member}: building index in maintenance mode")
+            name = self._build_index_in_maintenance(
+                member, database, collection, keys, options
+            )
+            event.log(f"{member}: index {name} built, rejoining the replica set")
+            return f"index {name} built"
+
+        try:
+            results = self._rolling_apply(build_index, self._replset_members())
+        except RuntimeError as e:
+            event.fail(f"rolling index build failed: {e}")
+            return
+        event.set_results(
+            {self._pod_name(member): result for member, result in results.items()}
+        )
+
+    # actions: load-test
+    def on_load_test(self, event):
+        params = event.params
+        uri = params["uri"] or (
+            self.standalone_uri if self.standalone else self.replica_set_uri
+        )
+        try:
+            results = run_load_test(
+                uri,
+                params["database"],
+                params["collection"],
+                read_preference=params["read-preference"],
+                operations=params["operations"],
+                records=params["records"],
+                proportions={
+                    "read": params["read-proportion"],
+                    "update": params["update-proportion"],
+                    "insert": params["insert-proportion"],
+                },
+                document_size=params["document-size"],
+                threads=params["threads"],
+            )
+        except Exception as e:
+            logger.error(f"load test failed. error={e}")
+            event.fail(f"load test failed: {e}")
+            return
+        event.set_results(results)
+
+    # actions: recommend-scale
+    def on_recommend_scale(self, event):
+        members = self.members
+        samples = {member: [] for member in members}
+        deadline = time.time() + event.params["duration"]
+        while True:
+            for member in members:
+                uri = member_uri(member)
+                samples[member].append(
+                    {
+                        "server_status": MongoConnector.server_status(uri),
+                        "repl_status": (
+                            None
+                            if self.standalone
+                            else MongoConnector.replset_get_status(uri)
+                        ),
+                    }
+                )
+            if time.time() >= deadline:
+                break
+            time.sleep(event.params["interval"])
+        for member in members:
+            samples[member][-1]["db_stats"] = MongoConnector.db_stats(
+                member_uri(member)
+            )
+
+        metrics = {
+            self._pod_name(member): summarize_member(member_samples)
+            for member, member_samples in samples.items()
+        }
+        if not any(metrics.values()):
+            event.fail("cannot get the server status of any member")
+            return
+        recommendations = recommend(metrics, len(members), standalone=self.standalone)
+        event.set_results(
+            {
+                "members": metrics,
+                "recommendations": {
+                    str(i): recommendation
+                    for i, recommendation in enumerate(recommendations, start=1)
+                }
+                or "none",
+            }
+        )
+
+    # actions: compact
+    def on_compact(self, event):
+        database = event.params["database"]
+        collections = event.params["collections"].split(",")
+        collections = [c.strip() for c in collections if c.strip()]
+
+        if self.standalone:
+            results = {
+                self.model.app.name: self._compact_member(
+                    self.standalone_uri, database, collections
+                )
+            }
+            event.set_results(results)
+            return
+
+        def compact(member):
+            event.log(f"{member}: compacting {database}")
+            result = self._compact_member(member_uri(member), database, collections)
+            event.log(
+                f"{member}: {result['bytes-reclaimed']} bytes reclaimed "
+                f"in {result['duration-secs']}s"
+            )
+            return result
+
+        try:
+            results = self._rolling_apply(compact, self._replset_members())
+        except RuntimeError as e:
+            event.fail(f"rolling compaction failed: {e}")
+            return
+        event.set_results(
+            {self._pod_name(member): result for member, result in results.items()}
+        )
+
     # #############################################
     # ############## PROPERTIES ###################
     # #############################################
@@ -234,6 +510,21 @@ class MongoDBCharm(CharmBase):
     def standalone(self):
         return self.model.config["standalone"]
 
+    @property
+    def members(self):
+        if self.standalone:
+            return [f"{self.model.app.name}:{self.port}"]
+        return [f"{host}:{self.port}" for host in self.cluster.hosts]
+
+    @property
+    def prewarm_namespaces(self):
+        collections = self.model.config["prewarm_collections"]
+        return [c.strip() for c in collections.split(",") if c.strip()]
+
+    @property
+    def rolling_restart(self):
+        return self.model.config["rolling_restart"] and not self.standalone
+
     # #############################################
     # ############# PRIVATE METHODS ###############
     # #############################################
@@ -251,9 +542,362 @@ class MongoDBCharm(CharmBase):
                 if not config.get(setting):
                     problem = f"missing config {setting}"
                     problems.append(problem)
+        for setting, storage in [
+            ("separate_journal", "journal"),
+            ("separate_logs", "logs"),
+        ]:
+            if config.get(setting) and not self._storage_location(storage):
+                problem = f"{setting} requires {storage} storage"
+                problems.append(problem)
+        for setting in ["pod_anti_affinity", "zone_topology_spread"]:
+            if config.get(setting) not in SCHEDULING_POLICIES:
+                problem = f"invalid config {setting}"
+                problems.append(problem)
+        if not all("." in namespace for namespace in self.prewarm_namespaces):
+            problem = "invalid config prewarm_collections"
+            problems.append(problem)
+        if self.prewarm_namespaces and not self.rolling_restart:
+            problem = "prewarm_collections requires rolling_restart"
+            problems.append(problem)
 
         return ";".join(problems)
 
+    def _storage_location(self, name):
+        # The journal and logs storages are optional (see metadata.yaml)
+        storages = self.model.storages[name]
+        return str(storages[0].location) if storages else None
+
+    def _configure_update_strategy(self):
+        # The live strategy is checked, since Juju might reset it
+        # when it updates or recreates the StatefulSet
+        update_strategy = "OnDelete" if self.rolling_restart else "RollingUpdate"
+        if update_strategy == self.state.update_strategy == "RollingUpdate":
+            return True
+        namespace = self.model.name
+        app_name = self.model.app.name
+        current = K8sConnector.statefulset_update_strategy(namespace, app_name)
+        if current is None:
+            return False
+        if current != update_strategy:
+            logger.info(f"Setting the StatefulSet update strategy to {update_strategy}")
+            if not K8sConnector.statefulset_set_update_strategy(
+                namespace, app_name, update_strategy
+            ):
+                return False
+        self.state.update_strategy = update_strategy
+        return True
+
+    def _rolling_restart(self):
+        namespace = self.model.name
+        revision = K8sConnector.statefulset_update_revision(
+            namespace, self.model.app.name
+        )
+        if not revision:
+            return True
+
+        outdated_members = [
+            f"{host}:{self.port}"
+            for host in self.cluster.hosts
+            if K8sConnector.pod_revision(namespace, self._pod_name(host)) != revision
+        ]
+        if not outdated_members:
+            return True
+
+        logger.info(f"Rolling restart of {outdated_members}")
+        self.unit.status = MaintenanceStatus(
+            f"Rolling restart of {len(outdated_members)} members"
+        )
+        config = self.model.config
+
+        def restart_member(member):
+            pod_name = self._pod_name(member)
+            # The member is not electable until its cache is warm
+            priority = None
+            if self.prewarm_namespaces:
+                priority = self._set_member_priority(member, 0)
+            try:
+                if not K8sConnector.delete_pod(namespace, pod_name):
+                    raise RuntimeError(f"cannot delete pod {pod_name}")
+                deadline = time.time() + config["rolling_restart_timeout"]
+                while K8sConnector.pod_revision(namespace, pod_name) != revision:
+                    if time.time() > deadline:
+                        raise RuntimeError(f"pod {pod_name} was not recreated")
+                    time.sleep(5)
+                if self.prewarm_namespaces:
+                    self._prewarm_member(member)
+            finally:
+                if priority is not None:
+                    self._set_member_priority(member, priority)
+
+        try:
+            self._rolling_apply(restart_member, outdated_members)
+        except RuntimeError as e:
+            logger.error(f"Rolling restart failed. error={e}")
+            self.unit.status = BlockedStatus(f"Rolling restart failed: {e}")
+            return False
+        return True
+
+    def _prewarm_member(self, member):
+        config = self.model.config
+        if not wait_for_member(
+            member,
+            config["rolling_restart_max_lag"],
+            config["rolling_restart_timeout"],
+        ):
+            raise RuntimeError(f"{member} did not catch up after the restart")
+        self.unit.status = MaintenanceStatus(f"Prewarming cache of {member}")
+        result = prewarm(
+            member_uri(member),
+            self.prewarm_namespaces,
+            indexes=config["prewarm_indexes"],
+            batch_size=config["prewarm_batch_size"],
+            sleep_ms=config["prewarm_sleep_ms"],
+        )
+        logger.info(f"Cache of {member} prewarmed: {result}")
+
+    def _set_member_priority(self, member, priority):
+        # Returns the previous priority of the member, or None if it was
+        # not changed. Raises RuntimeError if the priority cannot be set.
+        config = MongoConnector.replset_get_config(self.replica_set_uri)
+        if not config:
+            raise RuntimeError(f"cannot set the priority of {member}")
+        if len(config["members"]) < 2:
+            return None
+        for config_member in config["members"]:
+            host = config_member["host"]
+            if self._member_name(host) == member:
+                previous_priority = config_member.get("priority", 1)
+                config_member["priority"] = priority
+                break
+        else:
+            return None
+        config["version"] += 1
+        if not MongoConnector.replset_reconfigure(
+            self.replica_set_uri, config, force=False
+        ):
+            raise RuntimeError(f"cannot set the priority of {member}")
+        return previous_priority
+
+    def _profiled_databases(self, uri, database):
+        return [database] if database else MongoConnector.list_databases(uri)
+
+    def _set_profiling_level(self, database, level, slowms):
+        results = {}
+        for member in self.members:
+            uri = member_uri(member)
+            for db in self._profiled_databases(uri, database):
+                previous = MongoConnector.set_profiling_level(uri, db, level, slowms)
+                if previous is None:
+                    return None
+            results[self._pod_name(member)] = f"level={level} slowms={slowms}"
+        return results
+
+    def _configure_tickets(self):
+        # Tickets are applied live with setParameter, so changing
+        # them does not restart the members. Tickets set back to 0 are
+        # reset to the mongod default once.
+        configured = [
+            ticket
+            for ticket in WT_TICKET_PARAMETERS
+            if self.model.config[f"wt_{ticket}_tickets"]
+        ]
+        tickets = {
+            ticket: self.model.config[f"wt_{ticket}_tickets"] or DEFAULT_WT_TICKETS
+            for ticket in WT_TICKET_PARAMETERS
+            if ticket in configured or ticket in self.state.wt_tickets_applied
+        }
+        if not tickets:
+            return True
+
+        applied = True
+        for member in self.members:
+            uri = member_uri(member)
+            if self._ticket_counts(uri, tickets) == tickets:
+                continue
+            MongoConnector.set_parameters(
+                uri,
+                {WT_TICKET_PARAMETERS[ticket]: n for ticket, n in tickets.items()},
+            )
+            ticket_counts = self._ticket_counts(uri, tickets)
+            if ticket_counts != tickets:
+                logger.error(
+                    f"WiredTiger tickets not applied on {member}. "
+                    f"expected={tickets} serverStatus={ticket_counts}"
+                )
+                applied = False
+        self.state.wt_tickets_applied = configured if applied else list(tickets)
+        return applied
+
+    def _ticket_counts(self, uri, tickets):
+        status = MongoConnector.server_status(uri)
+        if not status:
+            return None
+        transactions = status.get("wiredTiger", {}).get("concurrentTransactions", {})
+        return {
+            ticket: transactions.get(ticket, {}).get("totalTickets")
+            for ticket in tickets
+        }
+
+    def _compact_member(self, uri, database, collections):
+        start = time.time()
+        collections = collections or MongoConnector.list_collections(uri, database)
+        reclaimed = 0
+        failed = []
+        for collection in collections:
+            before = self._collection_size(uri, database, collection)
+            if not MongoConnector.compact(uri, database, collection):
+                failed.append(collection)
+                continue
+            reclaimed += before - self._collection_size(uri, database, collection)
+        result = {
+            "bytes-reclaimed": reclaimed,
+            "duration-secs": round(time.time() - start, 1),
+        }
+        if failed:
+            result["failed"] = ",".join(failed)
+        return result
+
+    def _collection_size(self, uri, database, collection):
+        stats = MongoConnector.coll_stats(uri, database, collection) or {}
+        return stats.get("storageSize", 0) + stats.get("totalIndexSize", 0)
+
+    def _rolling_apply(self, operation, members):
+        config = self.model.config
+        return rolling_apply(
+            self.replica_set_uri,
+            operation,
+            members=members,
+            max_lag=config["rolling_restart_max_lag"],
+            timeout=config["rolling_restart_timeout"],
+            step_down_secs=config["step_down_secs"],
+            catch_up_secs=config["catch_up_secs"],
+        )
+
+    def _replset_members(self):
+        config = MongoConnector.replset_get_config(self.replica_set_uri)
+        if not config:
+            raise RuntimeError("cannot get the replica set config")
+        members = []
+        for member in config["members"]:
+            host = member["host"]
+            members.append(self._member_name(host))
+        return members
+
+    def _wait_for_mongod(self, uri):
+        deadline = time.time() + self.model.config["rolling_restart_timeout"]
+        while not MongoConnector.ready(uri):
+            if time.time() > deadline:
+                raise RuntimeError(f"mongod not ready at {uri}")
+            time.sleep(5)
+
+    def _build_index_in_maintenance(self, member, database, collection, keys, options):
+        # Restart the member as a standalone, build the index
+        # and restart it again as a member of the replica set
+        namespace = self.model.name
+        pod_name = self._pod_name(member)
+        host = member.split(":")[0]
+        maintenance_uri = member_uri(f"{host}:{MAINTENANCE_PORT}")
+
+        if not K8sConnector.exec_in_pod(
+            namespace, pod_name, "mongodb", ["touch", MAINTENANCE_FILE]
+        ):
+            raise RuntimeError(f"cannot enable maintenance mode on {pod_name}")
+        try:
+            if not MongoConnector.shutdown(member_uri(member)):
+                raise RuntimeError(f"cannot restart {member}")
+            self._wait_for_mongod(maintenance_uri)
+            name = MongoConnector.create_index(
+                maintenance_uri, database, collection, keys, **options
+            )
+            if not name:
+                raise RuntimeError(f"cannot build the index on {member}")
+        finally:
+            K8sConnector.exec_in_pod(
+                namespace, pod_name, "mongodb", ["rm", "-f", MAINTENANCE_FILE]
+            )
+            MongoConnector.shutdown(maintenance_uri)
+        return name
+
+    def _configure_pod_scheduling(self):
+        # Juju's v3 pod spec has no affinity or topology spread fields,
+        # so they are patched into the StatefulSet pod template
+        config = self.model.config
+        scheduling = make_pod_scheduling(
+            self.model.app.name,
+            anti_affinity=config["pod_anti_affinity"],
+            zone_spread=config["zone_topology_spread"],
+        )
+        enabled = any(value is not None for value in scheduling.values())
+        if not enabled and not self.state.pod_scheduling_applied:
+            return True
+
+        namespace = self.model.name
+        app_name = self.model.app.name
+        current = K8sConnector.statefulset_pod_scheduling(
+            namespace, app_name, list(scheduling)
+        )
+        if current is None:
+            return False
+        if current != scheduling and not K8sConnector.statefulset_set_pod_scheduling(
+            namespace, app_name, scheduling, current
+        ):
+            return False
+        self.state.pod_scheduling_applied = enabled
+        return True
+
+    def _configure_member_tags(self):
+        # Keep the member tags up to date, e.g. when the feature is
+        # enabled on an existing cluster or a pod is rescheduled
+        tags = self._member_tags()
+        if tags is None or (not tags and not self.state.member_tags_applied):
+            return
+        uri = self.replica_set_uri
+        config = MongoConnector.replset_get_config(uri)
+        if not config:
+            return
+        # The hosts of the replica set config might include the port
+        tags = {self._member_name(host): t for host, t in tags.items()}
+        tags = {
+            member["host"]: tags.get(self._member_name(member["host"]), {})
+            for member in config["members"]
+        }
+        new_config = MongoConnector.replset_set_tags(config, tags)
+        if new_config != config:
+            logger.info(f"Updating member tags: {tags}")
+            new_config["version"] += 1
+            if not MongoConnector.replset_reconfigure(uri, new_config, force=False):
+                return
+        self.state.member_tags_applied = any(tags.values())
+
+    def _member_tags(self):
+        # Tag the members with their failure domains only
+        # if the members are spread across them.
+        # Returns None if the failure domains cannot be found.
+        config = self.model.config
+        if (
+            config["pod_anti_affinity"] == "none"
+            and config["zone_topology_spread"] == "none"
+        ):
+            return {}
+        tags = {}
+        for host in self.cluster.hosts:
+            node = K8sConnector.pod_node(self.model.name, self._pod_name(host))
+            if not node:
+                return None
+            tags[host] = {"node": node}
+            zone = K8sConnector.node_zone(node)
+            if zone:
+                tags[host]["zone"] = zone
+        return tags
+
+    def _member_name(self, host):
+        # host: <app>-<id>.<app>-endpoints[:port] -> host:port
+        return host if ":" in host else f"{host}:{self.port}"
+
+    def _pod_name(self, host):
+        # host: <app>-<id>.<app>-endpoints[:port] or <app>[:port]
+        return host.split(".")[0].split(":")[0]
+
     @property
     def replica_set_uri(self):
         uri = "mongodb://"
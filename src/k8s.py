@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+import logging
+
+from kubernetes import client, config
+from kubernetes.stream import stream
+
+logger = logging.getLogger(__name__)
+
+REVISION_LABEL = "controller-revision-hash"
+ZONE_LABELS = ["topology.kubernetes.io/zone", "failure-domain.beta.kubernetes.io/zone"]
+
+
+class K8sConnector:
+    @staticmethod
+    def _load_config():
+        # The charm runs in the operator pod, inside the cluster
+        config.load_incluster_config()
+
+    @staticmethod
+    def statefulset_set_update_strategy(namespace: str, name: str, strategy: str):
+        updated = False
+        try:
+            K8sConnector._load_config()
+            body = {"spec": {"updateStrategy": {"type": strategy}}}
+            if strategy == "OnDelete":
+                body["spec"]["updateStrategy"]["rollingUpdate"] = None
+            client.AppsV1Api().patch_namespaced_stateful_set(name, namespace, body)
+            updated = True
+            logger.debug(f"statefulset {name} update strategy set to {strategy}")
+        except Exception as e:
+            logger.error(f"cannot set update strategy of {name}. error={e}")
+        return updated
+
+    @staticmethod
+    def statefulset_update_strategy(namespace: str, name: str):
+        strategy = None
+        try:
+            K8sConnector._load_config()
+            statefulset = client.AppsV1Api().read_namespaced_stateful_set(
+                name, namespace
+            )
+            strategy = statefulset.spec.update_strategy.type
+        except Exception as e:
+            logger.error(f"cannot get update strategy of {name}. error={e}")
+        return strategy
+
+    @staticmethod
+    def statefulset_update_revision(namespace: str, name: str):
+        revision = None
+        try:
+            K8sConnector._load_config()
+            statefulset = client.AppsV1Api().read_namespaced_stateful_set(
+                name, namespace
+            )
+            revision = statefulset.status.update_revision
+        except Exception as e:
+            logger.error(f"cannot get update revision of {name}. error={e}")
+        return revision
+
+    @staticmethod
+    def pod_revision(namespace: str, name: str):
+        revision = None
+        try:
+            K8sConnector._load_config()
+            pod = client.CoreV1Api().read_namespaced_pod(name, namespace)
+            revision = pod.metadata.labels.get(REVISION_LABEL)
+        except Exception as e:
+            logger.error(f"cannot get revision of pod {name}. error={e}")
+        return revision
+
+    @staticmethod
+    def delete_pod(namespace: str, name: str):
+        deleted = False
+        try:
+            K8sConnector._load_config()
+            client.CoreV1Api().delete_namespaced_pod(name, namespace)
+            deleted = True
+            logger.debug(f"pod {name} deleted")
+        except Exception as e:
+            logger.error(f"cannot delete pod {name}. error={e}")
+        return deleted
+
+    @staticmethod
+    def exec_in_pod(namespace: str, name: str, container: str, command: list):
+        executed = False
+        try:
+            K8sConnector._load_config()
+            output = stream(
+                client.CoreV1Api().connect_get_namespaced_pod_exec,
+                name,
+                namespace,
+                container=container,
+                command=command,
+                stderr=True,
+                stdin=False,
+                stdout=True,
+                tty=False,
+            )
+            executed = True
+            logger.debug(f"executed {command} in pod {name}. output={output}")
+        except Exception as e:
+            logger.error(f"cannot execute {command} in pod {name}. error={e}")
+        return executed
+
+    @staticmethod
+    def pod_node(namespace: str, name: str):
+        node = None
+        try:
+            K8sConnector._load_config()
+            pod = client.CoreV1Api().read_namespaced_pod(name, namespace)
+            node = pod.spec.node_name
+        except Exception as e:
+            logger.error(f"cannot get node of pod {name}. error={e}")
+        return node
+
+    @staticmethod
+    def node_zone(name: str):
+        zone = None
+        try:
+            K8sConnector._load_config()
+            labels = client.CoreV1Api().read_node(name).metadata.labels or {}
+            zone = next((labels[k] for k in ZONE_LABELS if k in labels), None)
+        except Exception as e:
+            logger.error(f"cannot get zone of node {name}. error={e}")
+        return zone
+
+    @staticmethod
+    def statefulset_pod_scheduling(namespace: str, name: str, fields: list):
+        scheduling = None
+        try:
+            K8sConnector._load_config()
+            statefulset = client.AppsV1Api().read_namespaced_stateful_set(
+                name, namespace
+            )
+            pod_spec = client.ApiClient().sanitize_for_serialization(
+                statefulset.spec.template.spec
+            )
+            scheduling = {field: pod_spec.get(field) for field in fields}
+        except Exception as e:
+            logger.error(f"cannot get pod scheduling of {name}. error={e}")
+        return scheduling
+
+    @staticmethod
+    def statefulset_set_pod_scheduling(
+        namespace: str, name: str, scheduling: dict, current: dict
+    ):
+        # JSON patch, so that the fields are replaced as a whole
+        # instead of being merged with the current ones
+        body = []
+        for field, value in scheduling.items():
+            path = f"/spec/template/spec/{field}"
+            if value is not None:
+                body.append({"op": "add", "path": path, "value": value})
+            elif current.get(field) is not None:
+                body.append({"op": "remove", "path": path})
+        if not body:
+            return True
+        updated = False
+        try:
+            K8sConnector._load_config()
+            client.AppsV1Api().patch_namespaced_stateful_set(name, namespace, body)
+            updated = True
+            logger.debug(f"statefulset {name} pod scheduling set to {scheduling}")
+        except Exception as e:
+            logger.error(f"cannot set pod scheduling of {name}. error={e}")
+        return updated
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+import logging
+import random
+import string
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pymongo import MongoClient
+
+logger = logging.getLogger(__name__)
+
+OPERATIONS = ["read", "update", "insert"]
+PERCENTILES = [50, 95, 99]
+LOAD_BATCH_SIZE = 1000
+
+
+def make_document(key: int, document_size: int) -> dict:
+    payload = "".join(random.choices(string.ascii_letters, k=document_size))
+    return {"_id": key, "payload": payload}
+
+
+def percentile(latencies: list, pct: int) -> float:
+    """
+    Nearest-rank percentile
+
+    :param: latencies:  Sorted list of latencies
+    :param: pct:        Percentile (0-100)
+
+    :return:            Latency at the percentile, 0 if there are no latencies
+    """
+    if not latencies:
+        return 0
+    rank = max(int(round(pct / 100 * len(latencies))), 1)
+    return latencies[min(rank, len(latencies)) - 1]
+
+
+def load(collection, records: int, document_size: int):
+    for start in range(0, records, LOAD_BATCH_SIZE):
+        end = min(start + LOAD_BATCH_SIZE, records)
+        collection.insert_many(
+            [make_document(key, document_size) for key in range(start, end)]
+        )
+
+
+def run_workload(
+    collection,
+    operations: int = 10000,
+    records: int = 1000,
+    proportions: dict = None,
+    document_size: int = 1000,
+    threads: int = 8,
+) -> dict:
+    """
+    Run a YCSB-style workload against a collection
+
+    The collection is loaded with records documents. Then the operations are
+    run by a pool of threads, picking reads, updates and inserts of uniformly
+    chosen keys with the given proportions.
+
+    :param: collection:     pymongo Collection (or a stand-in with the same API)
+    :param: operations:     Number of operations to run
+    :param: records:        Number of documents loaded before the run
+    :param: proportions:    Dictionary with the proportion of each operation
+    :param: document_size:  Size of the document payload in bytes
+    :param: threads:        Number of concurrent clients
+
+    :return:                Throughput and latency percentiles (ms) per operation
+    """
+    proportions = proportions or {"read": 0.5, "update": 0.5, "insert": 0}
+    load(collection, records, document_size)
+
+    weights = [proportions.get(op, 0) for op in OPERATIONS]
+    latencies = {op: [] for op in OPERATIONS}
+    lock = threading.Lock()
+    next_key = [records]
+
+    def run_operation(_):
+        op = random.choices(OPERATIONS, weights=weights)[0]
+        if op == "insert":
+            with lock:
+                key = next_key[0]
+                next_key[0] += 1
+        else:
+            key = random.randrange(records)
+        start = time.perf_counter()
+        if op == "read":
+            collection.find_one({"_id": key})
+        elif op == "update":
+            payload = make_document(key, document_size)["payload"]
+            collection.update_one({"_id": key}, {"$set": {"payload": payload}})
+        else:
+            collection.insert_one(make_document(key, document_size))
+        latency = (time.perf_counter() - start) * 1000
+        with lock:
+            latencies[op].append(latency)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(run_operation, range(operations)))
+    duration = time.perf_counter() - start
+
+    results = {
+        "operations": operations,
+        "duration-secs": round(duration, 3),
+        "ops-per-sec": round(operations / duration, 2) if duration else 0,
+    }
+    for op, op_latencies in latencies.items():
+        if not op_latencies:
+            continue
+        op_latencies.sort()
+        results[op] = {"count": len(op_latencies)}
+        for pct in PERCENTILES:
+            results[op][f"p{pct}-ms"] = round(percentile(op_latencies, pct), 3)
+    return results
+
+
+def run_load_test(
+    uri: str,
+    database: str,
+    collection: str,
+    read_preference: str = "primary",
+    **workload,
+) -> dict:
+    """
+    Run a workload against a MongoDB uri and drop the collection afterwards
+
+    The collection must not exist or be empty, so a load test never drops
+    application data.
+
+    :param: uri:                MongoDB uri
+    :param: database:           Database of the load test collection
+    :param: collection:         Load test collection, dropped after the run
+    :param: read_preference:    Read preference of the client
+    :param: workload:           Arguments for run_workload
+
+    :return:                    Results of run_workload
+    """
+    client = MongoClient(
+        uri,
+        serverSelectionTimeoutMS=1000,
+        readPreference=read_preference,
+        maxPoolSize=max(workload.get("threads", 8), 1),
+    )
+    try:
+        load_test_collection = client[database][collection]
+        if load_test_collection.estimated_document_count():
+            raise RuntimeError(f"{database}.{collection} is not empty")
+        logger.debug(f"running load test on {database}.{collection}: {workload}")
+        try:
+            return run_workload(load_test_collection, **workload)
+        finally:
+            load_test_collection.drop()
+    finally:
+        client.close()
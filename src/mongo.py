@@ -1,9 +1,14 @@
-from pymongo import MongoClient
-from pymongo.errors import ServerSelectionTimeoutError
+from pymongo import MongoClient, DESCENDING
+from pymongo.errors import AutoReconnect, ServerSelectionTimeoutError
 import logging
 
 logger = logging.getLogger(__name__)
 
+SYSTEM_DATABASES = ["admin", "config", "local"]
+
+# Member tag -> name of the write concern spreading writes across its values
+WRITE_MODES = {"node": "multiNode", "zone": "multiZone"}
+
 
 class MongoConnector:
     @staticmethod
@@ -26,14 +31,43 @@ class MongoConnector:
         replica_set_name: str,
         increase_version: bool = False,
         config: dict = {},
+        tags: dict = None,
     ):
         new_config = config.copy()
         new_config["_id"] = replica_set_name
         new_config["members"] = [{"_id": i, "host": h} for i, h in enumerate(hosts)]
+        if tags:
+            new_config = MongoConnector.replset_set_tags(new_config, tags)
         if "version" in new_config and increase_version:
             new_config["version"] += 1
         return new_config
 
+    @staticmethod
+    def replset_set_tags(config: dict, tags: dict):
+        new_config = config.copy()
+        new_config["members"] = [
+            dict(member, tags=tags.get(member["host"], {}))
+            for member in config["members"]
+        ]
+        settings = dict(new_config.get("settings", {}))
+        settings["getLastErrorModes"] = MongoConnector.replset_write_modes(
+            [member["host"] for member in config["members"]], tags
+        )
+        new_config["settings"] = settings
+        return new_config
+
+    @staticmethod
+    def replset_write_modes(hosts: list, tags: dict):
+        # Write concerns spreading a majority of the writes across
+        # distinct failure domains, e.g. {w: "multiZone"}
+        majority = len(hosts) // 2 + 1
+        modes = {}
+        for tag, mode in WRITE_MODES.items():
+            values = {t[tag] for t in tags.values() if t and tag in t}
+            if values:
+                modes[mode] = {tag: min(len(values), majority)}
+        return modes
+
     @staticmethod
     def replset_initialize(uri: str, config: dict):
         client = MongoClient(uri, serverSelectionTimeoutMS=1000)
@@ -46,14 +80,19 @@ class MongoConnector:
             client.close()
 
     @staticmethod
-    def replset_reconfigure(uri: str, config: dict):
+    def replset_reconfigure(uri: str, config: dict, force: bool = True):
+        # A forced reconfiguration is only meant for a replica set that
+        # lost its majority, and might roll back majority-committed writes
         replset_client = MongoClient(uri, serverSelectionTimeoutMS=1000)
+        reconfigured = False
         try:
-            replset_client.admin.command("replSetReconfig", config, force=True)
+            replset_client.admin.command("replSetReconfig", config, force=force)
+            reconfigured = True
         except Exception as e:
             logger.error(f"cannot reconfigure replica set. error={e}")
         finally:
             replset_client.close()
+        return reconfigured
 
     @staticmethod
     def replset_get_config(uri: str):
@@ -67,6 +106,198 @@ class MongoConnector:
             replset_client.close()
         return config
 
+    @staticmethod
+    def replset_get_status(uri: str):
+        replset_client = MongoClient(uri, serverSelectionTimeoutMS=1000)
+        status = None
+        try:
+            status = replset_client.admin.command("replSetGetStatus")
+        except Exception as e:
+            logger.error(f"cannot get replica set status. error={e}")
+        finally:
+            replset_client.close()
+        return status
+
+    @staticmethod
+    def replset_step_down(uri: str, step_down_secs: int = 60, catch_up_secs: int = 10):
+        replset_client = MongoClient(uri, serverSelectionTimeoutMS=1000)
+        stepped_down = False
+        try:
+            logger.debug(
+                f"stepping down primary for {step_down_secs}s "
+                f"(catch up period: {catch_up_secs}s)"
+            )
+            replset_client.admin.command(
+                "replSetStepDown",
+                step_down_secs,
+                secondaryCatchUpPeriodSecs=catch_up_secs,
+            )
+            stepped_down = True
+        except Exception as e:
+            logger.error(f"cannot step down primary. error={e}")
+        finally:
+            replset_client.close()
+        return stepped_down
+
+    @staticmethod
+    def list_databases(uri: str):
+        client = MongoClient(uri, serverSelectionTimeoutMS=1000)
+        databases = []
+        try:
+            databases = [
+                name
+                for name in client.list_database_names()
+                if name not in SYSTEM_DATABASES
+            ]
+        except Exception as e:
+            logger.error(f"cannot list databases. error={e}")
+        finally:
+            client.close()
+        return databases
+
+    @staticmethod
+    def set_profiling_level(uri: str, database: str, level: int, slowms: int):
+        client = MongoClient(uri, serverSelectionTimeoutMS=1000)
+        previous = None
+        try:
+            logger.debug(
+                f"setting profiling level={level} slowms={slowms} on {database}"
+            )
+            previous = client[database].command("profile", level, slowms=slowms)
+        except Exception as e:
+            logger.error(f"cannot set profiling level. error={e}")
+        finally:
+            client.close()
+        return previous
+
+    @staticmethod
+    def get_profile_entries(uri: str, database: str, limit: int = 1000):
+        client = MongoClient(uri, serverSelectionTimeoutMS=1000)
+        entries = []
+        try:
+            entries = list(
+                client[database]["system.profile"]
+                .find()
+                .sort("ts", DESCENDING)
+                .limit(limit)
+            )
+        except Exception as e:
+            logger.error(f"cannot get profile entries. error={e}")
+        finally:
+            client.close()
+        return entries
+
+    @staticmethod
+    def create_index(uri: str, database: str, collection: str, keys, **options):
+        client = MongoClient(uri, serverSelectionTimeoutMS=1000)
+        name = None
+        try:
+            logger.debug(f"creating index {keys} on {database}.{collection}")
+            name = client[database][collection].create_index(keys, **options)
+        except Exception as e:
+            logger.error(f"cannot create index. error={e}")
+        finally:
+            client.close()
+        return name
+
+    @staticmethod
+    def shutdown(uri: str):
+        client = MongoClient(uri, serverSelectionTimeoutMS=1000)
+        shutdown = False
+        try:
+            client.admin.command("shutdown")
+            shutdown = True
+        except ServerSelectionTimeoutError as e:
+            logger.error(f"cannot shutdown mongod. error={e}")
+        except AutoReconnect:
+            # The connection is closed by the server while shutting down
+            shutdown = True
+        except Exception as e:
+            logger.error(f"cannot shutdown mongod. error={e}")
+        finally:
+            client.close()
+        return shutdown
+
+    @staticmethod
+    def set_parameters(uri: str, parameters: dict):
+        client = MongoClient(uri, serverSelectionTimeoutMS=1000)
+        updated = False
+        try:
+            logger.debug(f"setting parameters {parameters}")
+            client.admin.command("setParameter", 1, **parameters)
+            updated = True
+        except Exception as e:
+            logger.error(f"cannot set parameters. error={e}")
+        finally:
+            client.close()
+        return updated
+
+    @staticmethod
+    def server_status(uri: str):
+        client = MongoClient(uri, serverSelectionTimeoutMS=1000)
+        status = None
+        try:
+            status = client.admin.command("serverStatus")
+        except Exception as e:
+            logger.error(f"cannot get server status. error={e}")
+        finally:
+            client.close()
+        return status
+
+    @staticmethod
+    def db_stats(uri: str, database: str = "admin"):
+        client = MongoClient(uri, serverSelectionTimeoutMS=1000)
+        stats = None
+        try:
+            stats = client[database].command("dbStats")
+        except Exception as e:
+            logger.error(f"cannot get database stats. error={e}")
+        finally:
+            client.close()
+        return stats
+
+    @staticmethod
+    def list_collections(uri: str, database: str):
+        client = MongoClient(uri, serverSelectionTimeoutMS=1000)
+        collections = []
+        try:
+            collections = [
+                name
+                for name in client[database].list_collection_names()
+                if not name.startswith("system.")
+            ]
+        except Exception as e:
+            logger.error(f"cannot list collections. error={e}")
+        finally:
+            client.close()
+        return collections
+
+    @staticmethod
+    def coll_stats(uri: str, database: str, collection: str):
+        client = MongoClient(uri, serverSelectionTimeoutMS=1000)
+        stats = None
+        try:
+            stats = client[database].command("collStats", collection)
+        except Exception as e:
+            logger.error(f"cannot get collection stats. error={e}")
+        finally:
+            client.close()
+        return stats
+
+    @staticmethod
+    def compact(uri: str, database: str, collection: str):
+        client = MongoClient(uri, serverSelectionTimeoutMS=1000)
+        compacted = False
+        try:
+            logger.debug(f"compacting {database}.{collection}")
+            client[database].command("compact", collection)
+            compacted = True
+        except Exception as e:
+            logger.error(f"cannot compact {database}.{collection}. error={e}")
+        finally:
+            client.close()
+        return compacted
+
 
 # class Mongo:
 #     def __init__(self, standalone_uri, replica_set_uri=None):
@@ -3,12 +3,110 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Label set by Juju on the pods of an application
+APP_LABEL = "juju-app"
 
-def make_pod_command(port: int = 27017, replica_set_name: str = None) -> dict:
-    command = f"mongod --bind_ip 0.0.0.0 --port {port}"
+ZONE_TOPOLOGY_KEY = "topology.kubernetes.io/zone"
+NODE_TOPOLOGY_KEY = "kubernetes.io/hostname"
+
+DB_PATH = "/data/db"
+
+# If this file exists, mongod starts as a standalone
+# on the maintenance port instead of joining the replica set
+MAINTENANCE_FILE = f"{DB_PATH}/.maintenance"
+
+
+# Transparent huge pages settings disabled by the host tuning init container
+THP_SETTINGS = [
+    "/sys/kernel/mm/transparent_hugepage/enabled",
+    "/sys/kernel/mm/transparent_hugepage/defrag",
+]
+
+
+def make_ulimits(max_open_files: int = None, max_processes: int = None) -> str:
+    ulimits = []
+    if max_open_files:
+        ulimits.append(f"ulimit -n {max_open_files}")
+    if max_processes:
+        ulimits.append(f"ulimit -u {max_processes}")
+    return " && ".join(ulimits)
+
+
+def make_journal_link(journal_path: str = None) -> str:
+    # WiredTiger always writes the journal to <dbpath>/journal,
+    # so it is moved to the journal storage and replaced by a symlink
+    if not journal_path:
+        return ""
+    journal = f"{DB_PATH}/journal"
+    return (
+        f"{{ [ -L {journal} ] || {{ mkdir -p {journal} "
+        f"&& cp -a {journal}/. {journal_path}/ "
+        f"&& rm -rf {journal} && ln -s {journal_path} {journal}; }}; }}"
+    )
+
+
+def make_pod_command(
+    port: int = 27017,
+    replica_set_name: str = None,
+    maintenance_port: int = None,
+    numa_interleave: bool = False,
+    max_open_files: int = None,
+    max_processes: int = None,
+    journal_path: str = None,
+    log_path: str = None,
+    max_connections: int = None,
+    wt_cache_size_gb: float = None,
+) -> dict:
+    mongod = "numactl --interleave=all mongod" if numa_interleave else "mongod"
+    if log_path:
+        mongod = (
+            f"{mongod} --logpath {log_path}/mongod.log --logappend --setParameter "
+            f"diagnosticDataCollectionDirectoryPath={log_path}/diagnostic.data"
+        )
+    if max_connections:
+        mongod = f"{mongod} --maxConns {max_connections}"
+    if wt_cache_size_gb:
+        mongod = f"{mongod} --wiredTigerCacheSizeGB {wt_cache_size_gb}"
+    command = f"{mongod} --bind_ip 0.0.0.0 --port {port}"
     if replica_set_name:
         command = f"{command} --replSet {replica_set_name}"
-    return command.split(" ")
+    setup = " && ".join(
+        filter(
+            None,
+            [
+                make_ulimits(max_open_files, max_processes),
+                make_journal_link(journal_path),
+            ],
+        )
+    )
+    if not maintenance_port and not setup:
+        return command.split(" ")
+
+    script = f"exec {command}"
+    if maintenance_port:
+        maintenance_command = (
+            f"{mongod} --bind_ip 0.0.0.0 --port {maintenance_port} "
+            "--setParameter disableLogicalSessionCacheRefresh=true"
+        )
+        script = (
+            f"if [ -f {MAINTENANCE_FILE} ]; then exec {maintenance_command}; "
+            f"else {script}; fi"
+        )
+    if setup:
+        script = f"{setup} && {script}"
+    return ["bash", "-c", script]
+
+
+def make_host_tuning_container(image_info: dict) -> dict:
+    command = " && ".join(f"echo never > {setting}" for setting in THP_SETTINGS)
+    return {
+        "name": "host-tuning",
+        "init": True,
+        "imageDetails": image_info,
+        "imagePullPolicy": "Always",
+        "command": ["sh", "-c", command],
+        "kubernetes": {"securityContext": {"privileged": True}},
+    }
 
 
 def make_pod_ports(port):
@@ -32,6 +130,69 @@ def make_liveness_probe():
     }
 
 
+def make_pod_affinity(app_name: str, anti_affinity: str = "none"):
+    if anti_affinity == "none":
+        return None
+    term = {
+        "labelSelector": {
+            "matchExpressions": [
+                {"key": APP_LABEL, "operator": "In", "values": [app_name]}
+            ]
+        },
+        "topologyKey": NODE_TOPOLOGY_KEY,
+    }
+    if anti_affinity == "required":
+        pod_anti_affinity = {"requiredDuringSchedulingIgnoredDuringExecution": [term]}
+    else:
+        pod_anti_affinity = {
+            "preferredDuringSchedulingIgnoredDuringExecution": [
+                {"weight": 100, "podAffinityTerm": term}
+            ]
+        }
+    return {"podAntiAffinity": pod_anti_affinity}
+
+
+def make_topology_spread_constraints(app_name: str, zone_spread: str = "none"):
+    if zone_spread == "none":
+        return None
+    return [
+        {
+            "maxSkew": 1,
+            "topologyKey": ZONE_TOPOLOGY_KEY,
+            "whenUnsatisfiable": (
+                "DoNotSchedule" if zone_spread == "required" else "ScheduleAnyway"
+            ),
+            "labelSelector": {"matchLabels": {APP_LABEL: app_name}},
+        }
+    ]
+
+
+def make_pod_scheduling(
+    app_name: str, anti_affinity: str = "none", zone_spread: str = "none"
+) -> dict:
+    """
+    Generate the scheduling fields of the pod template
+
+    The v3 pod spec has no field for them, so the charm patches them
+    into the StatefulSet. A None value removes the field.
+
+    :param: app_name:       Name of the application
+    :param: anti_affinity:  Pod anti-affinity between members:
+                            none, preferred or required
+    :param: zone_spread:    Topology spread of the members across zones:
+                            none, preferred or required
+
+    :return:                Dictionary with the affinity and the
+                            topologySpreadConstraints of the pod template
+    """
+    return {
+        "affinity": make_pod_affinity(app_name, anti_affinity),
+        "topologySpreadConstraints": make_topology_spread_constraints(
+            app_name, zone_spread
+        ),
+    }
+
+
 def make_service_account():
     return {
         "roles": [
@@ -40,16 +201,48 @@ def make_service_account():
                     {
                         "apiGroups": [""],
                         "resources": ["pods"],
-                        "verbs": ["list"],
-                    }
+                        "verbs": ["get", "list", "delete"],
+                    },
+                    {
+                        "apiGroups": [""],
+                        "resources": ["pods/exec"],
+                        "verbs": ["get", "create"],
+                    },
+                    {
+                        "apiGroups": ["apps"],
+                        "resources": ["statefulsets"],
+                        "verbs": ["get", "patch"],
+                    },
                 ]
-            }
+            },
+            {
+                # Nodes are needed to know the zone of each member
+                "global": True,
+                "rules": [
+                    {
+                        "apiGroups": [""],
+                        "resources": ["nodes"],
+                        "verbs": ["get"],
+                    }
+                ],
+            },
         ]
     }
 
 
 def make_pod_spec(
-    image_info: dict, port: int = 27017, replica_set_name: str = None
+    image_info: dict,
+    port: int = 27017,
+    replica_set_name: str = None,
+    maintenance_port: int = None,
+    host_tuning: bool = False,
+    numa_interleave: bool = False,
+    max_open_files: int = None,
+    max_processes: int = None,
+    journal_path: str = None,
+    log_path: str = None,
+    max_connections: int = None,
+    wt_cache_size_gb: float = None,
 ) -> dict:
     """
     Generate the pod spec
@@ -58,19 +251,47 @@ def make_pod_spec(
                                 OCIImageResource("mongodb-image").fetch()
     :param: port:               Port for the container
     :param: replica_set_name:   Name for the replica set
+    :param: maintenance_port:   Port for mongod when started as a standalone
+                                for maintenance
+    :param: host_tuning:        Add a privileged init container disabling
+                                transparent huge pages on the node
+    :param: numa_interleave:    Run mongod with numactl --interleave=all
+    :param: max_open_files:     File descriptor limit for mongod
+    :param: max_processes:      Process limit for mongod
+    :param: journal_path:       Mount point of the journal storage
+                                (journal kept in the db storage if None)
+    :param: log_path:           Mount point of the log storage
+                                (logs sent to stdout if None)
+    :param: max_connections:    Maximum number of incoming connections
+    :param: wt_cache_size_gb:   Size of the WiredTiger cache in GB
+                                (mongod default if None)
 
     :return:                    Pod spec dictionary for the charm
     """
-    command = make_pod_command(port, replica_set_name=replica_set_name)
+    command = make_pod_command(
+        port,
+        replica_set_name=replica_set_name,
+        maintenance_port=maintenance_port,
+        numa_interleave=numa_interleave,
+        max_open_files=max_open_files,
+        max_processes=max_processes,
+        journal_path=journal_path,
+        log_path=log_path,
+        max_connections=max_connections,
+        wt_cache_size_gb=wt_cache_size_gb,
+    )
     ports = make_pod_ports(port)
     readiness_probe = make_readiness_probe(port)
     liveness_probe = make_liveness_probe()
     service_account = make_service_account()
 
+    containers = [make_host_tuning_container(image_info)] if host_tuning else []
+
     return {
         "version": 3,
         "serviceAccount": service_account,
-        "containers": [
+        "containers": containers
+        + [
             {
                 "name": "mongodb",
                 "imageDetails": image_info,
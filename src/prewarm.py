@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+import logging
+import time
+
+from pymongo import MongoClient
+
+logger = logging.getLogger(__name__)
+
+
+def _throttled_scan(cursor, batch_size: int, sleep_ms: int) -> int:
+    scanned = 0
+    for _ in cursor:
+        scanned += 1
+        if scanned % batch_size == 0:
+            time.sleep(sleep_ms / 1000)
+    return scanned
+
+
+def prewarm_collection(
+    collection, indexes: bool = True, batch_size: int = 1000, sleep_ms: int = 10
+) -> dict:
+    """
+    Load a collection, and optionally its indexes, into the WiredTiger cache
+
+    The documents are read with a collection scan and each index with a
+    covered index scan, sleeping sleep_ms after every batch_size entries.
+
+    :param: collection: pymongo Collection
+    :param: indexes:    Whether to prewarm the indexes or not
+    :param: batch_size: Number of entries read between sleeps
+    :param: sleep_ms:   Milliseconds to sleep between batches
+
+    :return:            Number of documents and index entries read
+    """
+    result = {"documents": 0, "index-entries": 0}
+    cursor = collection.find({}, batch_size=batch_size).hint([("$natural", 1)])
+    result["documents"] = _throttled_scan(cursor, batch_size, sleep_ms)
+
+    if not indexes:
+        return result
+    for index in collection.list_indexes():
+        projection = {key: 1 for key in index["key"]}
+        if "_id" not in projection:
+            projection["_id"] = 0
+        try:
+            cursor = collection.find(
+                {}, projection, batch_size=batch_size, hint=index["name"]
+            )
+            result["index-entries"] += _throttled_scan(cursor, batch_size, sleep_ms)
+        except Exception as e:
+            # Some indexes (text, partial...) cannot be scanned with an empty query
+            logger.warning(f"cannot prewarm index {index['name']}. error={e}")
+    return result
+
+
+def prewarm(
+    uri: str,
+    namespaces: list,
+    indexes: bool = True,
+    batch_size: int = 1000,
+    sleep_ms: int = 10,
+) -> dict:
+    """
+    Prewarm the cache of a member with the given collections
+
+    :param: uri:        Uri of the member (direct connection)
+    :param: namespaces: List of collections to prewarm (<database>.<collection>)
+    :param: indexes:    Whether to prewarm the indexes or not
+    :param: batch_size: Number of entries read between sleeps
+    :param: sleep_ms:   Milliseconds to sleep between batches
+
+    :return:            Number of documents and index entries read
+                        and the time taken
+    """
+    start = time.time()
+    result = {"documents": 0, "index-entries": 0}
+    client = MongoClient(uri, serverSelectionTimeoutMS=1000)
+    try:
+        for namespace in namespaces:
+            database, collection = namespace.split(".", 1)
+            logger.debug(f"prewarming {namespace}")
+            collection_result = prewarm_collection(
+                client[database][collection], indexes, batch_size, sleep_ms
+            )
+            for key, value in collection_result.items():
+                result[key] += value
+    except Exception as e:
+        logger.error(f"cannot prewarm {uri}. error={e}")
+    finally:
+        client.close()
+    result["duration-secs"] = round(time.time() - start, 1)
+    return result
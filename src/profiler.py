@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Fields of the profiled command holding the query predicate
+PREDICATE_FIELDS = ["filter", "q", "query", "pipeline"]
+
+
+def _shape(value):
+    if isinstance(value, dict):
+        return {k: _shape(v) for k, v in value.items()}
+    if isinstance(value, list) and any(isinstance(v, dict) for v in value):
+        return [_shape(v) for v in value]
+    return 1
+
+
+def query_shape(entry: dict) -> str:
+    """
+    Query shape of a system.profile entry
+
+    The values of the predicate and the sort are replaced by 1, so queries
+    only differing in their values share the same shape.
+
+    :param: entry:  Document from the system.profile collection
+
+    :return:        Query shape as a string
+    """
+    command = entry.get("command", {})
+    shape = {}
+    for field in PREDICATE_FIELDS:
+        if field in command:
+            shape[field] = _shape(command[field])
+            break
+    if "sort" in command:
+        shape["sort"] = _shape(command["sort"])
+    return json.dumps(shape, sort_keys=True)
+
+
+def is_missing_index_suspect(stats: dict, examined_ratio: int = 10) -> bool:
+    return stats["collscan"] or stats["examined-returned-ratio"] >= examined_ratio
+
+
+def aggregate_profile(
+    entries_by_member: dict, top: int = 10, examined_ratio: int = 10
+) -> list:
+    """
+    Aggregate the system.profile entries of several members by query shape
+
+    :param: entries_by_member:  Dictionary with the profile entries per member
+    :param: top:                Number of query shapes to return
+    :param: examined_ratio:     Docs examined/returned ratio above which a
+                                query shape is a missing index suspect
+
+    :return:                    List of query shape stats, sorted by total time
+    """
+    shapes = {}
+    for member, entries in entries_by_member.items():
+        for entry in entries:
+            key = (entry.get("ns"), entry.get("op"), query_shape(entry))
+            stats = shapes.setdefault(
+                key,
+                {
+                    "ns": key[0],
+                    "op": key[1],
+                    "shape": key[2],
+                    "count": 0,
+                    "total-millis": 0,
+                    "docs-examined": 0,
+                    "keys-examined": 0,
+                    "returned": 0,
+                    "collscan": False,
+                    "members": set(),
+                },
+            )
+            stats["count"] += 1
+            stats["total-millis"] += entry.get("millis", 0)
+            stats["docs-examined"] += entry.get("docsExamined", 0)
+            stats["keys-examined"] += entry.get("keysExamined", 0)
+            stats["returned"] += entry.get("nreturned", 0)
+            if entry.get("planSummary", "").startswith("COLLSCAN"):
+                stats["collscan"] = True
+            stats["members"].add(member)
+
+    report = sorted(shapes.values(), key=lambda s: s["total-millis"], reverse=True)
+    report = report[:top]
+    for stats in report:
+        stats["examined-returned-ratio"] = round(
+            stats["docs-examined"] / max(stats["returned"], 1), 2
+        )
+        stats["missing-index-suspect"] = is_missing_index_suspect(stats, examined_ratio)
+        stats["members"] = ",".join(sorted(stats["members"]))
+    return report
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+import logging
+import time
+
+from mongo import MongoConnector
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = "PRIMARY"
+
+
+def member_uri(member: str) -> str:
+    return f"mongodb://{member}/?directConnection=true"
+
+
+def members_in_rolling_order(status: dict) -> list:
+    """
+    Sort the members of the replica set so that the primary goes last
+
+    :param: status:     Output of the replSetGetStatus command
+
+    :return:            List of member names (host:port), secondaries first
+    """
+    members = status.get("members", [])
+    secondaries = sorted(m["name"] for m in members if m["stateStr"] != PRIMARY)
+    primaries = [m["name"] for m in members if m["stateStr"] == PRIMARY]
+    return secondaries + primaries
+
+
+def replication_lag(status: dict):
+    """
+    Replication lag, in seconds, of the member that reported the status
+
+    :param: status:     Output of the replSetGetStatus command run on the member
+
+    :return:            Lag in seconds, or None if there is no known primary
+    """
+    members = status.get("members", [])
+    primary = next((m for m in members if m["stateStr"] == PRIMARY), None)
+    myself = next((m for m in members if m.get("self")), None)
+    if not primary or not myself:
+        return None
+    return (primary["optimeDate"] - myself["optimeDate"]).total_seconds()
+
+
+def wait_for_member(
+    member: str, max_lag: int = 10, timeout: int = 600, interval: int = 5
+) -> bool:
+    """
+    Wait until the member is the PRIMARY or a SECONDARY with a replication
+    lag under max_lag
+
+    :param: member:     Member name (host:port)
+    :param: max_lag:    Maximum replication lag accepted, in seconds
+    :param: timeout:    Seconds to wait before giving up
+    :param: interval:   Seconds between checks
+
+    :return:            True if the member caught up, False otherwise
+    """
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = MongoConnector.replset_get_status(member_uri(member))
+        if status and status.get("myState") in (1, 2):
+            lag = replication_lag(status)
+            logger.debug(f"member {member} is in state {status['myState']} (lag={lag})")
+            if lag is not None and lag <= max_lag:
+                return True
+        time.sleep(interval)
+    return False
+
+
+def rolling_apply(
+    uri: str,
+    operation,
+    members: list = None,
+    max_lag: int = 10,
+    timeout: int = 600,
+    step_down_secs: int = 60,
+    catch_up_secs: int = 10,
+) -> dict:
+    """
+    Run an operation on the members of the replica set, one at a time
+
+    Secondaries go first. Each one has to come back as SECONDARY with a low
+    replication lag before the next one starts. Then the primary is stepped
+    down and the operation runs on it last, so the whole run costs at most
+    one planned election.
+
+    :param: uri:            Replica set uri
+    :param: operation:      Callable receiving the member name (host:port)
+    :param: members:        Only run the operation on these members (all if None)
+    :param: max_lag:        Maximum replication lag accepted, in seconds
+    :param: timeout:        Seconds to wait for each member to catch up
+    :param: step_down_secs: Seconds the former primary will not be electable
+    :param: catch_up_secs:  Seconds a secondary has to catch up on step down
+
+    :return:                Dictionary with the result of the operation per member
+    """
+    status = MongoConnector.replset_get_status(uri)
+    if not status:
+        raise RuntimeError("cannot get the replica set status")
+
+    results = {}
+    for member in members_in_rolling_order(status):
+        if members is not None and member not in members:
+            continue
+        is_primary = any(
+            m["name"] == member and m["stateStr"] == PRIMARY for m in status["members"]
+        )
+        if is_primary and len(status["members"]) > 1:
+            logger.info(f"stepping down primary {member}")
+            if not MongoConnector.replset_step_down(
+                member_uri(member), step_down_secs, catch_up_secs
+            ):
+                raise RuntimeError(f"cannot step down primary {member}")
+            if not wait_for_member(member, max_lag, timeout):
+                raise RuntimeError(
+                    f"no new primary elected after stepping down {member}"
+                )
+        logger.info(f"running rolling operation on {member}")
+        results[member] = operation(member)
+        if not wait_for_member(member, max_lag, timeout):
+            raise RuntimeError(f"{member} did not catch up after the operation")
+    return results
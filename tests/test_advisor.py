@@ -0,0 +1,130 @@
+"""Unit tests."""
+
+import unittest
+from datetime import datetime, timedelta
+
+from advisor import recommend, summarize_member
+
+
+def make_server_status(uptime, used, dirty, app_evictions, ops, write_available):
+    return {
+        "uptimeMillis": uptime,
+        "opcounters": {"query": ops, "insert": ops},
+        "wiredTiger": {
+            "cache": {
+                "maximum bytes configured": 100,
+                "bytes currently in the cache": used,
+                "tracked dirty bytes in the cache": dirty,
+                "pages evicted by application threads": app_evictions,
+            },
+            "concurrentTransactions": {
+                "read": {"available": 128, "totalTickets": 128},
+                "write": {"available": write_available, "totalTickets": 128},
+            },
+        },
+    }
+
+
+def make_repl_status(lag):
+    now = datetime(2020, 1, 1)
+    return {
+        "members": [
+            {"name": "mongodb-0:27017", "stateStr": "PRIMARY", "optimeDate": now},
+            {
+                "name": "mongodb-1:27017",
+                "stateStr": "SECONDARY",
+                "optimeDate": now - timedelta(seconds=lag),
+                "self": True,
+            },
+        ]
+    }
+
+
+class TestAdvisor(unittest.TestCase):
+    """Capacity advisor Unit Tests."""
+
+    def test_summarize_member(self):
+        samples = [
+            {
+                "server_status": make_server_status(0, 50, 5, 0, 0, 128),
+                "repl_status": make_repl_status(2),
+            },
+            {
+                "server_status": make_server_status(10000, 96, 25, 100, 500, 4),
+                "repl_status": make_repl_status(30),
+                "db_stats": {"fsUsedSize": 90, "fsTotalSize": 100},
+            },
+        ]
+
+        metrics = summarize_member(samples)
+
+        # Assertions
+        self.assertEqual(metrics["cache-used-ratio"], 0.96)
+        self.assertEqual(metrics["cache-dirty-ratio"], 0.25)
+        self.assertEqual(metrics["app-evictions-per-sec"], 10)
+        self.assertEqual(metrics["ops-per-sec"], 100)
+        self.assertEqual(metrics["write-ratio"], 0.5)
+        self.assertEqual(metrics["write-tickets-available-ratio"], 0.031)
+        self.assertEqual(metrics["read-tickets-available-ratio"], 1)
+        self.assertEqual(metrics["replication-lag-secs"], 30)
+        self.assertEqual(metrics["disk-usage-ratio"], 0.9)
+
+    def test_summarize_member_no_server_status(self):
+        self.assertEqual(summarize_member([{"server_status": None}]), {})
+
+    def test_recommend(self):
+        metrics = {
+            "mongodb-0": {
+                "cache-used-ratio": 0.96,
+                "cache-dirty-ratio": 0.25,
+                "app-evictions-per-sec": 10,
+                "write-tickets-available-ratio": 0.03,
+                "disk-usage-ratio": 0.9,
+            },
+            "mongodb-1": {
+                "cache-used-ratio": 0.5,
+                "cache-dirty-ratio": 0.01,
+                "app-evictions-per-sec": 0,
+                "replication-lag-secs": 30,
+            },
+        }
+
+        recommendations = recommend(metrics, 2)
+
+        # Assertions
+        self.assertEqual(len(recommendations), 5)
+        self.assertTrue(recommendations[0].startswith("add members"))
+        self.assertTrue(recommendations[1].startswith("raise the mem constraint"))
+        self.assertTrue(recommendations[2].startswith("shard"))
+        self.assertIn("mongodb-1", recommendations[3])
+        self.assertTrue(recommendations[4].startswith("add storage"))
+
+    def test_recommend_healthy(self):
+        metrics = {
+            "mongodb-0": {
+                "cache-used-ratio": 0.5,
+                "cache-dirty-ratio": 0.01,
+                "app-evictions-per-sec": 0,
+            }
+        }
+        self.assertEqual(recommend(metrics, 3), [])
+
+    def test_recommend_standalone(self):
+        metrics = {
+            "mongodb-0": {
+                "cache-used-ratio": 0.5,
+                "cache-dirty-ratio": 0.01,
+                "app-evictions-per-sec": 0,
+                "read-tickets-available-ratio": 0.02,
+            }
+        }
+
+        recommendations = recommend(metrics, 1, standalone=True)
+
+        # Assertions
+        self.assertEqual(len(recommendations), 1)
+        self.assertTrue(recommendations[0].startswith("raise wt_read_tickets"))
+
+
+if __name__ == "__main__":
+    unittest.main()
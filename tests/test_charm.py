@@ -1,9 +1,10 @@
 """Unit tests."""
 
 import unittest
-from unittest.mock import Mock, patch, PropertyMock
+from unittest.mock import Mock, call, patch, PropertyMock
 
 from charm import MongoDBCharm
+from pod_spec import make_pod_scheduling
 
 from ops.testing import Harness
 from oci_image import OCIImageResource, OCIImageResourceError
@@ -302,6 +303,1014 @@ class TestCharmReplicaSet(TestMongoDB):
         self.harness.charm.on.update_status.emit()
         self.assertEqual(self.harness.charm.unit.status, excepted_status)
 
+    # rolling restart
+    @patch("k8s.K8sConnector.statefulset_set_update_strategy")
+    @patch("k8s.K8sConnector.statefulset_update_strategy")
+    @patch("ops.model.Pod.set_spec")
+    @patch("mongo.MongoConnector.ready")
+    @patch("oci_image.OCIImageResource.fetch")
+    def test_on_config_changed_rolling_restart(
+        self,
+        mock_image_fetch,
+        mock_mongo_ready,
+        mock_set_spec,
+        mock_update_strategy,
+        mock_set_update_strategy,
+    ):
+        mock_mongo_ready.return_value = False
+        mock_update_strategy.return_value = "RollingUpdate"
+        mock_set_update_strategy.return_value = True
+
+        self.harness.update_config({"rolling_restart": True})
+
+        # Assertions
+        mock_set_update_strategy.assert_called_once_with(
+            self.harness.charm.model.name, "mongodb", "OnDelete"
+        )
+        self.assertEqual(self.harness.charm.state.update_strategy, "OnDelete")
+
+    @patch("k8s.K8sConnector.statefulset_set_update_strategy")
+    @patch("k8s.K8sConnector.statefulset_update_strategy")
+    @patch("mongo.MongoConnector.ready")
+    def test_on_update_status_update_strategy_retried(
+        self, mock_mongo_ready, mock_update_strategy, mock_set_update_strategy
+    ):
+        self.harness.disable_hooks()
+        self.harness.update_config({"rolling_restart": True})
+        self.harness.enable_hooks()
+        mock_mongo_ready.return_value = False
+        mock_update_strategy.return_value = "RollingUpdate"
+        mock_set_update_strategy.return_value = False
+
+        self.harness.charm.on.update_status.emit()
+
+        # Assertions
+        self.assertEqual(
+            self.harness.charm.unit.status,
+            BlockedStatus("Error setting the StatefulSet update strategy"),
+        )
+        self.assertEqual(self.harness.charm.state.update_strategy, "RollingUpdate")
+
+        mock_set_update_strategy.return_value = True
+        self.harness.charm.on.update_status.emit()
+
+        # Assertions
+        self.assertEqual(mock_set_update_strategy.call_count, 2)
+        self.assertEqual(self.harness.charm.state.update_strategy, "OnDelete")
+        self.assertEqual(
+            self.harness.charm.unit.status,
+            WaitingStatus(
+                f"replica-set-mode({self.replica_set_name}): service not ready yet"
+            ),
+        )
+
+    @patch("k8s.K8sConnector.statefulset_set_update_strategy")
+    @patch("k8s.K8sConnector.statefulset_update_strategy")
+    @patch("mongo.MongoConnector.ready")
+    def test_on_update_status_update_strategy_drifted(
+        self, mock_mongo_ready, mock_update_strategy, mock_set_update_strategy
+    ):
+        self.harness.disable_hooks()
+        self.harness.update_config({"rolling_restart": True})
+        self.harness.enable_hooks()
+        self.harness.charm.state.update_strategy = "OnDelete"
+        mock_mongo_ready.return_value = False
+        mock_update_strategy.return_value = "RollingUpdate"
+        mock_set_update_strategy.return_value = True
+
+        self.harness.charm.on.update_status.emit()
+
+        # Assertions
+        mock_set_update_strategy.assert_called_once_with(
+            self.harness.charm.model.name, "mongodb", "OnDelete"
+        )
+
+        mock_update_strategy.return_value = "OnDelete"
+        self.harness.charm.on.update_status.emit()
+
+        # Assertions
+        mock_set_update_strategy.assert_called_once()
+
+    @patch("charm.rolling_apply")
+    @patch("k8s.K8sConnector.pod_revision")
+    @patch("k8s.K8sConnector.statefulset_update_revision")
+    @patch("cluster.MongoDBCluster.replica_set_hosts", new_callable=PropertyMock)
+    @patch("cluster.MongoDBCluster.ready", new_callable=PropertyMock)
+    @patch("mongo.MongoConnector.ready")
+    @patch("k8s.K8sConnector.statefulset_update_strategy")
+    def test_on_update_status_rolling_restart_outdated_members(
+        self,
+        mock_update_strategy,
+        mock_mongo_ready,
+        mock_cluster_ready,
+        mock_replica_set_hosts,
+        mock_update_revision,
+        mock_pod_revision,
+        mock_rolling_apply,
+    ):
+        self.harness.disable_hooks()
+        self.harness.update_config({"rolling_restart": True})
+        self.harness.enable_hooks()
+        mock_update_strategy.return_value = "OnDelete"
+        mock_mongo_ready.return_value = True
+        mock_cluster_ready.return_value = True
+        mock_replica_set_hosts.return_value = ["one_member"]
+        mock_update_revision.return_value = "new"
+        mock_pod_revision.return_value = "old"
+
+        self.harness.charm.on.update_status.emit()
+
+        # Assertions
+        mock_rolling_apply.assert_called_once()
+        self.assertEqual(
+            mock_rolling_apply.call_args[1]["members"],
+            ["mongodb-0.mongodb-endpoints:27017"],
+        )
+
+    @patch("charm.rolling_apply")
+    @patch("k8s.K8sConnector.pod_revision")
+    @patch("k8s.K8sConnector.statefulset_update_revision")
+    @patch("cluster.MongoDBCluster.replica_set_hosts", new_callable=PropertyMock)
+    @patch("cluster.MongoDBCluster.ready", new_callable=PropertyMock)
+    @patch("mongo.MongoConnector.ready")
+    @patch("k8s.K8sConnector.statefulset_update_strategy")
+    def test_on_update_status_rolling_restart_failed(
+        self,
+        mock_update_strategy,
+        mock_mongo_ready,
+        mock_cluster_ready,
+        mock_replica_set_hosts,
+        mock_update_revision,
+        mock_pod_revision,
+        mock_rolling_apply,
+    ):
+        self.harness.disable_hooks()
+        self.harness.update_config({"rolling_restart": True})
+        self.harness.enable_hooks()
+        mock_update_strategy.return_value = "OnDelete"
+        mock_mongo_ready.return_value = True
+        mock_cluster_ready.return_value = True
+        mock_update_revision.return_value = "new"
+        mock_pod_revision.return_value = "old"
+        mock_rolling_apply.side_effect = RuntimeError("timeout")
+
+        self.harness.charm.on.update_status.emit()
+
+        # Assertions
+        self.assertEqual(
+            self.harness.charm.unit.status,
+            BlockedStatus("Rolling restart failed: timeout"),
+        )
+
+    # profiler actions
+    @patch("mongo.MongoConnector.set_profiling_level")
+    def test_on_set_profiler(self, mock_set_profiling_level):
+        mock_set_profiling_level.return_value = {"was": 0, "slowms": 100}
+        event = Mock(params={"level": 1, "slowms": 50, "database": "mydb"})
+
+        self.harness.charm.on_set_profiler(event)
+
+        # Assertions
+        mock_set_profiling_level.assert_called_once_with(
+            "mongodb://mongodb-0.mongodb-endpoints:27017/?directConnection=true",
+            "mydb",
+            1,
+            50,
+        )
+        event.set_results.assert_called_once_with({"mongodb-0": "level=1 slowms=50"})
+
+    @patch("mongo.MongoConnector.set_profiling_level")
+    def test_on_set_profiler_error(self, mock_set_profiling_level):
+        mock_set_profiling_level.return_value = None
+        event = Mock(params={"level": 1, "slowms": 50, "database": "mydb"})
+
+        self.harness.charm.on_set_profiler(event)
+
+        # Assertions
+        event.fail.assert_called_once()
+        event.set_results.assert_not_called()
+
+    @patch("mongo.MongoConnector.get_profile_entries")
+    @patch("mongo.MongoConnector.list_databases")
+    def test_on_profile_report(self, mock_list_databases, mock_get_profile_entries):
+        mock_list_databases.return_value = ["mydb"]
+        mock_get_profile_entries.return_value = [
+            {
+                "ns": "mydb.users",
+                "op": "query",
+                "command": {"find": "users", "filter": {"name": "foo"}},
+                "millis": 120,
+                "docsExamined": 5000,
+                "nreturned": 1,
+                "planSummary": "COLLSCAN",
+            },
+            {
+                "ns": "mydb.users",
+                "op": "query",
+                "command": {"find": "users", "filter": {"name": "bar"}},
+                "millis": 80,
+                "docsExamined": 5000,
+                "nreturned": 1,
+                "planSummary": "COLLSCAN",
+            },
+        ]
+        event = Mock(
+            params={"database": "", "top": 10, "limit": 1000, "examined-ratio": 10}
+        )
+
+        self.harness.charm.on_profile_report(event)
+
+        # Assertions
+        results = event.set_results.call_args[0][0]
+        self.assertEqual(results["entries"], 2)
+        self.assertEqual(len(results["shapes"]), 1)
+        self.assertEqual(results["shapes"]["1"]["count"], 2)
+        self.assertEqual(results["shapes"]["1"]["total-millis"], 200)
+        self.assertTrue(results["shapes"]["1"]["missing-index-suspect"])
+
+    # build-index action
+    @patch("mongo.MongoConnector.create_index")
+    @patch("mongo.MongoConnector.ready")
+    @patch("mongo.MongoConnector.shutdown")
+    @patch("k8s.K8sConnector.exec_in_pod")
+    @patch("charm.rolling_apply")
+    @patch("mongo.MongoConnector.replset_get_config")
+    def test_on_build_index(
+        self,
+        mock_replset_get_config,
+        mock_rolling_apply,
+        mock_exec_in_pod,
+        mock_shutdown,
+        mock_mongo_ready,
+        mock_create_index,
+    ):
+        mock_replset_get_config.return_value = {
+            "members": [{"_id": 0, "host": "mongodb-0.mongodb-endpoints"}]
+        }
+        mock_rolling_apply.side_effect = lambda uri, operation, **kwargs: {
+            member: operation(member) for member in kwargs["members"]
+        }
+        mock_exec_in_pod.return_value = True
+        mock_shutdown.return_value = True
+        mock_mongo_ready.return_value = True
+        mock_create_index.return_value = "name_1"
+        manager = Mock()
+        manager.attach_mock(mock_exec_in_pod, "exec_in_pod")
+        manager.attach_mock(mock_shutdown, "shutdown")
+        manager.attach_mock(mock_mongo_ready, "ready")
+        manager.attach_mock(mock_create_index, "create_index")
+        event = Mock(
+            params={
+                "database": "mydb",
+                "collection": "users",
+                "keys": '{"name": 1}',
+                "name": "",
+                "unique": False,
+            }
+        )
+
+        self.harness.charm.on_build_index(event)
+
+        # Assertions
+        namespace = self.harness.charm.model.name
+        member_uri = (
+            "mongodb://mongodb-0.mongodb-endpoints:27017/?directConnection=true"
+        )
+        maintenance_uri = (
+            "mongodb://mongodb-0.mongodb-endpoints:27018/?directConnection=true"
+        )
+        self.assertEqual(
+            manager.mock_calls,
+            [
+                call.exec_in_pod(
+                    namespace,
+                    "mongodb-0",
+                    "mongodb",
+                    ["touch", "/data/db/.maintenance"],
+                ),
+                call.shutdown(member_uri),
+                call.ready(maintenance_uri),
+                call.create_index(
+                    maintenance_uri, "mydb", "users", [("name", 1)], unique=False
+                ),
+                call.exec_in_pod(
+                    namespace,
+                    "mongodb-0",
+                    "mongodb",
+                    ["rm", "-f", "/data/db/.maintenance"],
+                ),
+                call.shutdown(maintenance_uri),
+            ],
+        )
+        event.set_results.assert_called_once_with({"mongodb-0": "index name_1 built"})
+
+    @patch("mongo.MongoConnector.create_index")
+    @patch("mongo.MongoConnector.ready")
+    @patch("mongo.MongoConnector.shutdown")
+    @patch("k8s.K8sConnector.exec_in_pod")
+    @patch("charm.rolling_apply")
+    @patch("mongo.MongoConnector.replset_get_config")
+    def test_on_build_index_error(
+        self,
+        mock_replset_get_config,
+        mock_rolling_apply,
+        mock_exec_in_pod,
+        mock_shutdown,
+        mock_mongo_ready,
+        mock_create_index,
+    ):
+        mock_replset_get_config.return_value = {
+            "members": [{"_id": 0, "host": "mongodb-0.mongodb-endpoints"}]
+        }
+        mock_rolling_apply.side_effect = lambda uri, operation, **kwargs: {
+            member: operation(member) for member in kwargs["members"]
+        }
+        mock_exec_in_pod.return_value = True
+        mock_shutdown.return_value = True
+        mock_mongo_ready.return_value = True
+        mock_create_index.return_value = None
+        event = Mock(
+            params={
+                "database": "mydb",
+                "collection": "users",
+                "keys": '{"name": 1}',
+                "name": "",
+                "unique": False,
+            }
+        )
+
+        self.harness.charm.on_build_index(event)
+
+        # Assertions
+        event.fail.assert_called_once_with(
+            "rolling index build failed: cannot build the index on "
+            "mongodb-0.mongodb-endpoints:27017"
+        )
+        # The member leaves maintenance mode even if the build failed
+        mock_exec_in_pod.assert_called_with(
+            self.harness.charm.model.name,
+            "mongodb-0",
+            "mongodb",
+            ["rm", "-f", "/data/db/.maintenance"],
+        )
+        mock_shutdown.assert_called_with(
+            "mongodb://mongodb-0.mongodb-endpoints:27018/?directConnection=true"
+        )
+
+    @patch("charm.rolling_apply")
+    @patch("mongo.MongoConnector.create_index")
+    def test_on_build_index_unique(self, mock_create_index, mock_rolling_apply):
+        mock_create_index.return_value = "name_1"
+        event = Mock(
+            params={
+                "database": "mydb",
+                "collection": "users",
+                "keys": '{"name": 1}',
+                "name": "",
+                "unique": True,
+            }
+        )
+
+        self.harness.charm.on_build_index(event)
+
+        # Assertions
+        mock_rolling_apply.assert_not_called()
+        mock_create_index.assert_called_once_with(
+            self.harness.charm.replica_set_uri,
+            "mydb",
+            "users",
+            [("name", 1)],
+            unique=True,
+        )
+
+    def test_on_build_index_invalid_keys(self):
+        event = Mock(
+            params={
+                "database": "mydb",
+                "collection": "users",
+                "keys": "name",
+                "name": "",
+                "unique": False,
+            }
+        )
+
+        self.harness.charm.on_build_index(event)
+
+        # Assertions
+        event.fail.assert_called_once_with("keys must be a JSON document")
+
+    # scheduling
+    @patch("k8s.K8sConnector.statefulset_set_pod_scheduling")
+    @patch("k8s.K8sConnector.statefulset_pod_scheduling")
+    @patch("ops.model.Pod.set_spec")
+    @patch("mongo.MongoConnector.ready")
+    @patch("oci_image.OCIImageResource.fetch")
+    def test_on_config_changed_pod_anti_affinity(
+        self,
+        mock_image_fetch,
+        mock_mongo_ready,
+        mock_set_spec,
+        mock_pod_scheduling,
+        mock_set_pod_scheduling,
+    ):
+        mock_mongo_ready.return_value = False
+        mock_pod_scheduling.return_value = {
+            "affinity": None,
+            "topologySpreadConstraints": None,
+        }
+        mock_set_pod_scheduling.return_value = True
+
+        self.harness.update_config(
+            {"pod_anti_affinity": "required", "zone_topology_spread": "preferred"}
+        )
+
+        # Assertions
+        self.assertEqual(mock_set_spec.call_args[0][0]["kubernetesResources"], {})
+        scheduling = mock_set_pod_scheduling.call_args[0][2]
+        self.assertIn(
+            "requiredDuringSchedulingIgnoredDuringExecution",
+            scheduling["affinity"]["podAntiAffinity"],
+        )
+        self.assertEqual(
+            scheduling["topologySpreadConstraints"][0]["whenUnsatisfiable"],
+            "ScheduleAnyway",
+        )
+        self.assertTrue(self.harness.charm.state.pod_scheduling_applied)
+
+    @patch("k8s.K8sConnector.statefulset_pod_scheduling")
+    @patch("mongo.MongoConnector.ready")
+    def test_on_update_status_pod_scheduling_error(
+        self, mock_mongo_ready, mock_pod_scheduling
+    ):
+        self.harness.disable_hooks()
+        self.harness.update_config({"pod_anti_affinity": "preferred"})
+        self.harness.enable_hooks()
+        mock_pod_scheduling.return_value = None
+
+        self.harness.charm.on.update_status.emit()
+
+        # Assertions
+        self.assertEqual(
+            self.harness.charm.unit.status,
+            BlockedStatus("Error setting the StatefulSet pod scheduling"),
+        )
+
+    @patch("mongo.MongoConnector.replset_reconfigure")
+    @patch("mongo.MongoConnector.replset_get_config")
+    @patch("k8s.K8sConnector.node_zone")
+    @patch("k8s.K8sConnector.pod_node")
+    @patch("k8s.K8sConnector.statefulset_pod_scheduling")
+    @patch("cluster.MongoDBCluster.replica_set_hosts", new_callable=PropertyMock)
+    @patch("cluster.MongoDBCluster.ready", new_callable=PropertyMock)
+    @patch("mongo.MongoConnector.ready")
+    def test_on_update_status_member_tags(
+        self,
+        mock_mongo_ready,
+        mock_cluster_ready,
+        mock_replica_set_hosts,
+        mock_pod_scheduling,
+        mock_pod_node,
+        mock_node_zone,
+        mock_replset_get_config,
+        mock_replset_reconfigure,
+    ):
+        self.harness.disable_hooks()
+        self.harness.update_config({"pod_anti_affinity": "preferred"})
+        self.harness.enable_hooks()
+        mock_mongo_ready.return_value = True
+        mock_cluster_ready.return_value = True
+        mock_replica_set_hosts.return_value = ["mongodb-0.mongodb-endpoints"]
+        mock_pod_scheduling.side_effect = lambda namespace, name, fields: (
+            make_pod_scheduling(name, anti_affinity="preferred")
+        )
+        mock_pod_node.return_value = "node-2"
+        mock_node_zone.return_value = None
+        mock_replset_get_config.return_value = {
+            "_id": "myreplica",
+            "version": 3,
+            "members": [
+                {"_id": 0, "host": "mongodb-0.mongodb-endpoints:27017", "tags": {}}
+            ],
+            "settings": {"getLastErrorModes": {}},
+        }
+        mock_replset_reconfigure.return_value = True
+
+        self.harness.charm.on.update_status.emit()
+
+        # Assertions
+        self.assertFalse(mock_replset_reconfigure.call_args[1]["force"])
+        config = mock_replset_reconfigure.call_args[0][1]
+        self.assertEqual(config["members"][0]["tags"], {"node": "node-2"})
+        self.assertEqual(
+            config["settings"]["getLastErrorModes"], {"multiNode": {"node": 1}}
+        )
+        self.assertEqual(config["version"], 4)
+        self.assertTrue(self.harness.charm.state.member_tags_applied)
+
+        # Nothing to update once the tags are applied
+        mock_replset_reconfigure.reset_mock()
+        mock_replset_get_config.return_value = config
+        self.harness.charm.on.update_status.emit()
+        mock_replset_reconfigure.assert_not_called()
+
+    @patch("ops.model.Pod.set_spec")
+    @patch("oci_image.OCIImageResource.fetch")
+    def test_on_config_changed_invalid_pod_anti_affinity(
+        self, mock_image_fetch, mock_set_spec
+    ):
+        self.harness.update_config({"pod_anti_affinity": "sometimes"})
+
+        # Assertions
+        mock_set_spec.assert_not_called()
+        self.assertEqual(
+            self.harness.charm.unit.status,
+            BlockedStatus("invalid config pod_anti_affinity"),
+        )
+
+    @patch("mongo.MongoConnector.replset_reconfigure")
+    @patch("mongo.MongoConnector.replset_get_config")
+    @patch("k8s.K8sConnector.node_zone")
+    @patch("k8s.K8sConnector.pod_node")
+    @patch("cluster.MongoDBCluster.replica_set_hosts", new_callable=PropertyMock)
+    @patch("charm.MongoDBCharm.on_update_status")
+    def test_reconfigure_member_tags(
+        self,
+        mock_on_update_status,
+        mock_replica_set_hosts,
+        mock_pod_node,
+        mock_node_zone,
+        mock_replset_get_config,
+        mock_replset_reconfigure,
+    ):
+        self.harness.disable_hooks()
+        self.harness.update_config({"pod_anti_affinity": "preferred"})
+        self.harness.enable_hooks()
+        mock_replica_set_hosts.return_value = ["old_member"]
+        mock_pod_node.return_value = "node-1"
+        mock_node_zone.return_value = "zone-a"
+        mock_replset_get_config.return_value = {"_id": "myreplica", "version": 1}
+
+        self.harness.charm.reconfigure(Mock())
+
+        # Assertions
+        config = mock_replset_reconfigure.call_args[0][1]
+        self.assertEqual(
+            config["members"][0]["tags"], {"node": "node-1", "zone": "zone-a"}
+        )
+        self.assertEqual(
+            config["settings"]["getLastErrorModes"],
+            {"multiNode": {"node": 1}, "multiZone": {"zone": 1}},
+        )
+        self.assertEqual(config["version"], 2)
+
+    # host tuning
+    @patch("ops.model.Pod.set_spec")
+    @patch("charm.MongoDBCharm.on_update_status")
+    @patch("oci_image.OCIImageResource.fetch")
+    def test_on_config_changed_host_tuning(
+        self, mock_image_fetch, mock_on_update_status, mock_set_spec
+    ):
+        self.harness.update_config(
+            {"host_tuning": True, "numa_interleave": True, "max_open_files": 64000}
+        )
+
+        # Assertions
+        init_container, mongodb_container = mock_set_spec.call_args[0][0]["containers"]
+        self.assertTrue(init_container["init"])
+        self.assertTrue(init_container["kubernetes"]["securityContext"]["privileged"])
+        script = mongodb_container["command"][2]
+        self.assertTrue(script.startswith("ulimit -n 64000 && "))
+        self.assertIn("exec numactl --interleave=all mongod", script)
+
+    # journal and log storage
+    @patch("ops.model.Pod.set_spec")
+    @patch("charm.MongoDBCharm.on_update_status")
+    @patch("oci_image.OCIImageResource.fetch")
+    def test_on_config_changed_separate_journal_and_logs(
+        self, mock_image_fetch, mock_on_update_status, mock_set_spec
+    ):
+        self.harness.add_storage("journal", attach=True)
+        self.harness.add_storage("logs", attach=True)
+        journal = self.harness.charm.model.storages["journal"][0].location
+        logs = self.harness.charm.model.storages["logs"][0].location
+
+        self.harness.update_config({"separate_journal": True, "separate_logs": True})
+
+        # Assertions
+        script = mock_set_spec.call_args[0][0]["containers"][0]["command"][2]
+        self.assertIn(f"ln -s {journal} /data/db/journal", script)
+        self.assertIn(f"--logpath {logs}/mongod.log", script)
+
+    @patch("ops.model.Pod.set_spec")
+    @patch("oci_image.OCIImageResource.fetch")
+    def test_on_config_changed_separate_journal_missing_storage(
+        self, mock_image_fetch, mock_set_spec
+    ):
+        self.harness.update_config({"separate_journal": True})
+
+        # Assertions
+        mock_set_spec.assert_not_called()
+        self.assertEqual(
+            self.harness.charm.unit.status,
+            BlockedStatus("separate_journal requires journal storage"),
+        )
+
+    @patch("ops.model.Pod.set_spec")
+    @patch("charm.MongoDBCharm.on_update_status")
+    @patch("oci_image.OCIImageResource.fetch")
+    def test_on_config_changed_no_journal_storage(
+        self, mock_image_fetch, mock_on_update_status, mock_set_spec
+    ):
+        self.harness.update_config({"max_open_files": 64000})
+
+        # Assertions
+        script = mock_set_spec.call_args[0][0]["containers"][0]["command"][2]
+        self.assertNotIn("/data/db/journal", script)
+        self.assertNotIn("--logpath", script)
+
+    # load-test action
+    @patch("charm.run_load_test")
+    def test_on_load_test(self, mock_run_load_test):
+        mock_run_load_test.return_value = {"operations": 10, "ops-per-sec": 100}
+        event = Mock(
+            params={
+                "operations": 10,
+                "records": 10,
+                "read-proportion": 1,
+                "update-proportion": 0,
+                "insert-proportion": 0,
+                "document-size": 10,
+                "threads": 1,
+                "read-preference": "secondary",
+                "database": "loadtest",
+                "collection": "usertable",
+                "uri": "",
+            }
+        )
+
+        self.harness.charm.on_load_test(event)
+
+        # Assertions
+        self.assertEqual(
+            mock_run_load_test.call_args[0][0], self.harness.charm.replica_set_uri
+        )
+        event.set_results.assert_called_once_with(
+            {"operations": 10, "ops-per-sec": 100}
+        )
+
+    # connection and concurrency limits
+    @patch("ops.model.Pod.set_spec")
+    @patch("charm.MongoDBCharm.on_update_status")
+    @patch("oci_image.OCIImageResource.fetch")
+    def test_on_config_changed_max_connections(
+        self, mock_image_fetch, mock_on_update_status, mock_set_spec
+    ):
+        self.harness.update_config({"max_connections": 500})
+
+        # Assertions
+        script = mock_set_spec.call_args[0][0]["containers"][0]["command"][2]
+        self.assertIn("--maxConns 500", script)
+
+    @patch("ops.model.Pod.set_spec")
+    @patch("charm.MongoDBCharm.on_update_status")
+    @patch("oci_image.OCIImageResource.fetch")
+    def test_on_config_changed_wt_cache_size(
+        self, mock_image_fetch, mock_on_update_status, mock_set_spec
+    ):
+        self.harness.update_config({"wt_cache_size_gb": 1.5})
+
+        # Assertions
+        script = mock_set_spec.call_args[0][0]["containers"][0]["command"][2]
+        self.assertIn("--wiredTigerCacheSizeGB 1.5", script)
+
+    @patch("mongo.MongoConnector.set_parameters")
+    @patch("mongo.MongoConnector.server_status")
+    @patch("cluster.MongoDBCluster.replica_set_hosts", new_callable=PropertyMock)
+    @patch("cluster.MongoDBCluster.ready", new_callable=PropertyMock)
+    @patch("mongo.MongoConnector.ready")
+    def test_on_update_status_wt_tickets(
+        self,
+        mock_mongo_ready,
+        mock_cluster_ready,
+        mock_replica_set_hosts,
+        mock_server_status,
+        mock_set_parameters,
+    ):
+        self.harness.disable_hooks()
+        self.harness.update_config({"wt_read_tickets": 64})
+        self.harness.enable_hooks()
+        mock_mongo_ready.return_value = True
+        mock_cluster_ready.return_value = True
+        mock_replica_set_hosts.return_value = ["one_member"]
+        mock_server_status.side_effect = [
+            {"wiredTiger": {"concurrentTransactions": {"read": {"totalTickets": 128}}}},
+            {"wiredTiger": {"concurrentTransactions": {"read": {"totalTickets": 64}}}},
+        ]
+
+        self.harness.charm.on.update_status.emit()
+
+        # Assertions
+        mock_set_parameters.assert_called_once_with(
+            "mongodb://mongodb-0.mongodb-endpoints:27017/?directConnection=true",
+            {"wiredTigerConcurrentReadTransactions": 64},
+        )
+        self.assertEqual(
+            self.harness.charm.unit.status,
+            ActiveStatus(
+                f"replica-set-mode({self.replica_set_name}): ready (1 members)"
+            ),
+        )
+
+    @patch("mongo.MongoConnector.set_parameters")
+    @patch("mongo.MongoConnector.server_status")
+    @patch("cluster.MongoDBCluster.replica_set_hosts", new_callable=PropertyMock)
+    @patch("cluster.MongoDBCluster.ready", new_callable=PropertyMock)
+    @patch("mongo.MongoConnector.ready")
+    def test_on_update_status_wt_tickets_not_applied(
+        self,
+        mock_mongo_ready,
+        mock_cluster_ready,
+        mock_replica_set_hosts,
+        mock_server_status,
+        mock_set_parameters,
+    ):
+        self.harness.disable_hooks()
+        self.harness.update_config({"wt_write_tickets": 64})
+        self.harness.enable_hooks()
+        mock_mongo_ready.return_value = True
+        mock_cluster_ready.return_value = True
+        mock_replica_set_hosts.return_value = ["one_member"]
+        mock_server_status.return_value = {
+            "wiredTiger": {"concurrentTransactions": {"write": {"totalTickets": 128}}}
+        }
+
+        self.harness.charm.on.update_status.emit()
+
+        # Assertions
+        self.assertEqual(
+            self.harness.charm.unit.status,
+            ActiveStatus(
+                f"replica-set-mode({self.replica_set_name}): ready (1 members)"
+                " (WiredTiger tickets not applied)"
+            ),
+        )
+
+    @patch("mongo.MongoConnector.set_parameters")
+    @patch("mongo.MongoConnector.server_status")
+    @patch("cluster.MongoDBCluster.replica_set_hosts", new_callable=PropertyMock)
+    @patch("cluster.MongoDBCluster.ready", new_callable=PropertyMock)
+    @patch("mongo.MongoConnector.ready")
+    def test_on_update_status_wt_tickets_reset(
+        self,
+        mock_mongo_ready,
+        mock_cluster_ready,
+        mock_replica_set_hosts,
+        mock_server_status,
+        mock_set_parameters,
+    ):
+        self.harness.charm.state.wt_tickets_applied = ["read"]
+        mock_mongo_ready.return_value = True
+        mock_cluster_ready.return_value = True
+        mock_replica_set_hosts.return_value = ["one_member"]
+        mock_server_status.side_effect = [
+            {"wiredTiger": {"concurrentTransactions": {"read": {"totalTickets": 64}}}},
+            {"wiredTiger": {"concurrentTransactions": {"read": {"totalTickets": 128}}}},
+        ]
+
+        self.harness.charm.on.update_status.emit()
+        self.harness.charm.on.update_status.emit()
+
+        # Assertions
+        mock_set_parameters.assert_called_once_with(
+            "mongodb://mongodb-0.mongodb-endpoints:27017/?directConnection=true",
+            {"wiredTigerConcurrentReadTransactions": 128},
+        )
+        self.assertEqual(list(self.harness.charm.state.wt_tickets_applied), [])
+
+    # recommend-scale action
+    @patch("mongo.MongoConnector.db_stats")
+    @patch("mongo.MongoConnector.replset_get_status")
+    @patch("mongo.MongoConnector.server_status")
+    def test_on_recommend_scale(
+        self, mock_server_status, mock_replset_get_status, mock_db_stats
+    ):
+        mock_server_status.return_value = {
+            "uptimeMillis": 1000,
+            "opcounters": {"query": 10},
+            "wiredTiger": {
+                "cache": {
+                    "maximum bytes configured": 100,
+                    "bytes currently in the cache": 50,
+                    "tracked dirty bytes in the cache": 1,
+                }
+            },
+        }
+        mock_replset_get_status.return_value = None
+        mock_db_stats.return_value = {"fsUsedSize": 10, "fsTotalSize": 100}
+        event = Mock(params={"duration": 0, "interval": 1})
+
+        self.harness.charm.on_recommend_scale(event)
+
+        # Assertions
+        results = event.set_results.call_args[0][0]
+        self.assertEqual(results["members"]["mongodb-0"]["disk-usage-ratio"], 0.1)
+        self.assertTrue(results["recommendations"]["1"].startswith("add members"))
+
+    @patch("mongo.MongoConnector.db_stats")
+    @patch("mongo.MongoConnector.replset_get_status")
+    @patch("mongo.MongoConnector.server_status")
+    def test_on_recommend_scale_no_server_status(
+        self, mock_server_status, mock_replset_get_status, mock_db_stats
+    ):
+        mock_server_status.return_value = None
+        event = Mock(params={"duration": 0, "interval": 1})
+
+        self.harness.charm.on_recommend_scale(event)
+
+        # Assertions
+        event.fail.assert_called_once()
+
+    # compact action
+    @patch("mongo.MongoConnector.compact")
+    @patch("mongo.MongoConnector.coll_stats")
+    @patch("charm.rolling_apply")
+    @patch("mongo.MongoConnector.replset_get_config")
+    def test_on_compact(
+        self,
+        mock_replset_get_config,
+        mock_rolling_apply,
+        mock_coll_stats,
+        mock_compact,
+    ):
+        mock_replset_get_config.return_value = {
+            "members": [{"_id": 0, "host": "mongodb-0.mongodb-endpoints"}]
+        }
+        mock_rolling_apply.side_effect = lambda uri, operation, **kwargs: {
+            member: operation(member) for member in kwargs["members"]
+        }
+        mock_coll_stats.side_effect = [
+            {"storageSize": 1000, "totalIndexSize": 100},
+            {"storageSize": 400, "totalIndexSize": 100},
+        ]
+        mock_compact.return_value = True
+        event = Mock(params={"database": "mydb", "collections": " users, "})
+
+        self.harness.charm.on_compact(event)
+
+        # Assertions
+        mock_compact.assert_called_once_with(
+            "mongodb://mongodb-0.mongodb-endpoints:27017/?directConnection=true",
+            "mydb",
+            "users",
+        )
+        results = event.set_results.call_args[0][0]
+        self.assertEqual(results["mongodb-0"]["bytes-reclaimed"], 600)
+
+    @patch("charm.rolling_apply")
+    @patch("mongo.MongoConnector.replset_get_config")
+    def test_on_compact_failed(self, mock_replset_get_config, mock_rolling_apply):
+        mock_replset_get_config.return_value = {"members": []}
+        mock_rolling_apply.side_effect = RuntimeError("cannot step down primary")
+        event = Mock(params={"database": "mydb", "collections": ""})
+
+        self.harness.charm.on_compact(event)
+
+        # Assertions
+        event.fail.assert_called_once_with(
+            "rolling compaction failed: cannot step down primary"
+        )
+
+    # cache prewarm
+    @patch("charm.prewarm")
+    @patch("charm.wait_for_member")
+    @patch("mongo.MongoConnector.replset_reconfigure")
+    @patch("mongo.MongoConnector.replset_get_config")
+    @patch("k8s.K8sConnector.delete_pod")
+    @patch("k8s.K8sConnector.pod_revision")
+    @patch("k8s.K8sConnector.statefulset_update_revision")
+    @patch("charm.rolling_apply")
+    def test_rolling_restart_prewarm(
+        self,
+        mock_rolling_apply,
+        mock_update_revision,
+        mock_pod_revision,
+        mock_delete_pod,
+        mock_replset_get_config,
+        mock_replset_reconfigure,
+        mock_wait_for_member,
+        mock_prewarm,
+    ):
+        self.harness.disable_hooks()
+        self.harness.update_config(
+            {"rolling_restart": True, "prewarm_collections": "mydb.users"}
+        )
+        self.harness.enable_hooks()
+        mock_rolling_apply.side_effect = lambda uri, operation, **kwargs: {
+            member: operation(member) for member in kwargs["members"]
+        }
+        mock_update_revision.return_value = "new"
+        mock_pod_revision.side_effect = ["old", "new"]
+        mock_delete_pod.return_value = True
+        mock_replset_get_config.side_effect = lambda uri: {
+            "version": 1,
+            "members": [
+                {"_id": 0, "host": "mongodb-0.mongodb-endpoints:27017"},
+                {"_id": 1, "host": "other-member:27017"},
+            ],
+        }
+        mock_replset_reconfigure.return_value = True
+        mock_wait_for_member.return_value = True
+        mock_prewarm.return_value = {"documents": 10}
+
+        self.assertTrue(self.harness.charm._rolling_restart())
+
+        # Assertions
+        mock_prewarm.assert_called_once()
+        self.assertEqual(mock_prewarm.call_args[0][1], ["mydb.users"])
+        priorities = [
+            c[0][1]["members"][0]["priority"]
+            for c in mock_replset_reconfigure.call_args_list
+        ]
+        self.assertEqual(priorities, [0, 1])
+        for c in mock_replset_reconfigure.call_args_list:
+            self.assertFalse(c[1]["force"])
+
+    @patch("mongo.MongoConnector.replset_reconfigure")
+    @patch("mongo.MongoConnector.replset_get_config")
+    @patch("k8s.K8sConnector.delete_pod")
+    @patch("k8s.K8sConnector.pod_revision")
+    @patch("k8s.K8sConnector.statefulset_update_revision")
+    @patch("charm.rolling_apply")
+    def test_rolling_restart_prewarm_priority_failed(
+        self,
+        mock_rolling_apply,
+        mock_update_revision,
+        mock_pod_revision,
+        mock_delete_pod,
+        mock_replset_get_config,
+        mock_replset_reconfigure,
+    ):
+        self.harness.disable_hooks()
+        self.harness.update_config(
+            {"rolling_restart": True, "prewarm_collections": "mydb.users"}
+        )
+        self.harness.enable_hooks()
+        mock_rolling_apply.side_effect = lambda uri, operation, **kwargs: {
+            member: operation(member) for member in kwargs["members"]
+        }
+        mock_update_revision.return_value = "new"
+        mock_pod_revision.return_value = "old"
+        mock_replset_get_config.return_value = {
+            "version": 1,
+            "members": [
+                {"_id": 0, "host": "mongodb-0.mongodb-endpoints:27017"},
+                {"_id": 1, "host": "other-member:27017"},
+            ],
+        }
+        mock_replset_reconfigure.return_value = False
+
+        self.assertFalse(self.harness.charm._rolling_restart())
+
+        # Assertions
+        mock_delete_pod.assert_not_called()
+        self.assertEqual(
+            self.harness.charm.unit.status,
+            BlockedStatus(
+                "Rolling restart failed: cannot set the priority of "
+                "mongodb-0.mongodb-endpoints:27017"
+            ),
+        )
+
+    @patch("ops.model.Pod.set_spec")
+    @patch("oci_image.OCIImageResource.fetch")
+    def test_on_config_changed_invalid_prewarm_collections(
+        self, mock_image_fetch, mock_set_spec
+    ):
+        self.harness.update_config(
+            {"rolling_restart": True, "prewarm_collections": "users"}
+        )
+
+        # Assertions
+        self.assertEqual(
+            self.harness.charm.unit.status,
+            BlockedStatus("invalid config prewarm_collections"),
+        )
+
+    @patch("ops.model.Pod.set_spec")
+    @patch("oci_image.OCIImageResource.fetch")
+    def test_on_config_changed_prewarm_without_rolling_restart(
+        self, mock_image_fetch, mock_set_spec
+    ):
+        self.harness.update_config(
+            {"rolling_restart": False, "prewarm_collections": "mydb.users"}
+        )
+
+        # Assertions
+        mock_set_spec.assert_not_called()
+        self.assertEqual(
+            self.harness.charm.unit.status,
+            BlockedStatus("prewarm_collections requires rolling_restart"),
+        )
 
 
 if __name__ == "__main__":
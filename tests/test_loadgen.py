@@ -0,0 +1,112 @@
+"""Unit tests."""
+
+import threading
+import unittest
+from unittest.mock import patch
+
+from loadgen import percentile, run_load_test, run_workload
+
+
+class FakeCollection:
+    """In-memory stand-in for a pymongo Collection."""
+
+    def __init__(self):
+        self.documents = {}
+        self.lock = threading.Lock()
+
+    def insert_many(self, documents):
+        with self.lock:
+            for document in documents:
+                self.documents[document["_id"]] = document
+
+    def insert_one(self, document):
+        self.insert_many([document])
+
+    def find_one(self, query):
+        with self.lock:
+            return self.documents.get(query["_id"])
+
+    def update_one(self, query, update):
+        with self.lock:
+            self.documents[query["_id"]].update(update["$set"])
+
+
+class TestLoadGenerator(unittest.TestCase):
+    """Load generator Unit Tests."""
+
+    def test_percentile(self):
+        latencies = list(range(1, 101))
+        self.assertEqual(percentile(latencies, 50), 50)
+        self.assertEqual(percentile(latencies, 99), 99)
+        self.assertEqual(percentile([], 99), 0)
+
+    def test_run_workload(self):
+        collection = FakeCollection()
+
+        results = run_workload(
+            collection,
+            operations=200,
+            records=50,
+            proportions={"read": 0.5, "update": 0.25, "insert": 0.25},
+            document_size=10,
+            threads=4,
+        )
+
+        # Assertions
+        self.assertEqual(results["operations"], 200)
+        self.assertGreater(results["ops-per-sec"], 0)
+        counts = sum(results[op]["count"] for op in ["read", "update", "insert"])
+        self.assertEqual(counts, 200)
+        self.assertEqual(len(collection.documents), 50 + results["insert"]["count"])
+        for op in ["read", "update", "insert"]:
+            self.assertLessEqual(results[op]["p50-ms"], results[op]["p99-ms"])
+
+    def test_run_workload_read_only(self):
+        collection = FakeCollection()
+
+        results = run_workload(
+            collection,
+            operations=50,
+            records=10,
+            proportions={"read": 1},
+            document_size=10,
+            threads=2,
+        )
+
+        # Assertions
+        self.assertEqual(results["read"]["count"], 50)
+        self.assertNotIn("update", results)
+        self.assertNotIn("insert", results)
+
+    @patch("loadgen.run_workload")
+    @patch("loadgen.MongoClient")
+    def test_run_load_test_non_empty_collection(self, mock_client, mock_run_workload):
+        collection = mock_client.return_value["test"]["loadtest"]
+        collection.estimated_document_count.return_value = 10
+
+        # Assertions
+        with self.assertRaises(RuntimeError):
+            run_load_test("mongodb://localhost", "test", "loadtest")
+        mock_run_workload.assert_not_called()
+        collection.drop.assert_not_called()
+        mock_client.return_value.close.assert_called_once()
+
+    @patch("loadgen.run_workload")
+    @patch("loadgen.MongoClient")
+    def test_run_load_test(self, mock_client, mock_run_workload):
+        collection = mock_client.return_value["test"]["loadtest"]
+        collection.estimated_document_count.return_value = 0
+        mock_run_workload.return_value = {"operations": 10}
+
+        results = run_load_test(
+            "mongodb://localhost", "test", "loadtest", operations=10
+        )
+
+        # Assertions
+        self.assertEqual(results, {"operations": 10})
+        mock_run_workload.assert_called_once_with(collection, operations=10)
+        collection.drop.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+"""Unit tests."""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+from prewarm import prewarm_collection
+
+
+class TestPrewarm(unittest.TestCase):
+    """Cache prewarm Unit Tests."""
+
+    @patch("prewarm.time.sleep")
+    def test_prewarm_collection(self, mock_sleep):
+        collection = MagicMock()
+        collection.find.return_value.hint.return_value = iter(range(5))
+        collection.find.side_effect = [
+            collection.find.return_value,
+            iter(range(5)),
+            iter(range(3)),
+        ]
+        collection.list_indexes.return_value = [
+            {"name": "_id_", "key": {"_id": 1}},
+            {"name": "name_1", "key": {"name": 1}},
+        ]
+
+        result = prewarm_collection(collection, batch_size=2, sleep_ms=10)
+
+        # Assertions
+        self.assertEqual(result, {"documents": 5, "index-entries": 8})
+        self.assertEqual(
+            collection.find.call_args_list[2][0], ({}, {"name": 1, "_id": 0})
+        )
+        self.assertEqual(mock_sleep.call_count, 5)
+
+    @patch("prewarm.time.sleep")
+    def test_prewarm_collection_no_indexes(self, mock_sleep):
+        collection = MagicMock()
+        collection.find.return_value.hint.return_value = iter(range(3))
+
+        result = prewarm_collection(collection, indexes=False, batch_size=10)
+
+        # Assertions
+        self.assertEqual(result, {"documents": 3, "index-entries": 0})
+        collection.list_indexes.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+"""Unit tests."""
+
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+
+from rolling import members_in_rolling_order, replication_lag, rolling_apply
+
+
+def make_status(primary_optime=None, self_optime=None):
+    now = datetime(2020, 1, 1)
+    return {
+        "myState": 2,
+        "members": [
+            {
+                "name": "mongodb-0:27017",
+                "stateStr": "PRIMARY",
+                "optimeDate": primary_optime or now,
+            },
+            {
+                "name": "mongodb-2:27017",
+                "stateStr": "SECONDARY",
+                "optimeDate": now,
+            },
+            {
+                "name": "mongodb-1:27017",
+                "stateStr": "SECONDARY",
+                "optimeDate": self_optime or now,
+                "self": True,
+            },
+        ],
+    }
+
+
+class TestRolling(unittest.TestCase):
+    """Rolling operations Unit Tests."""
+
+    def test_members_in_rolling_order(self):
+        order = members_in_rolling_order(make_status())
+        self.assertEqual(
+            order, ["mongodb-1:27017", "mongodb-2:27017", "mongodb-0:27017"]
+        )
+
+    def test_replication_lag(self):
+        now = datetime(2020, 1, 1)
+        status = make_status(
+            primary_optime=now, self_optime=now - timedelta(seconds=30)
+        )
+        self.assertEqual(replication_lag(status), 30)
+
+    def test_replication_lag_no_primary(self):
+        status = make_status()
+        status["members"][0]["stateStr"] = "SECONDARY"
+        self.assertIsNone(replication_lag(status))
+
+    @patch("rolling.wait_for_member")
+    @patch("mongo.MongoConnector.replset_step_down")
+    @patch("mongo.MongoConnector.replset_get_status")
+    def test_rolling_apply_primary_last(
+        self, mock_get_status, mock_step_down, mock_wait_for_member
+    ):
+        mock_get_status.return_value = make_status()
+        mock_step_down.return_value = True
+        mock_wait_for_member.return_value = True
+        operation = Mock(return_value="done")
+
+        results = rolling_apply("mongodb://replica", operation)
+
+        # Assertions
+        self.assertEqual(
+            [c[0][0] for c in operation.call_args_list],
+            ["mongodb-1:27017", "mongodb-2:27017", "mongodb-0:27017"],
+        )
+        mock_step_down.assert_called_once()
+        self.assertEqual(len(results), 3)
+
+    @patch("rolling.wait_for_member")
+    @patch("mongo.MongoConnector.replset_step_down")
+    @patch("mongo.MongoConnector.replset_get_status")
+    def test_rolling_apply_member_not_back(
+        self, mock_get_status, mock_step_down, mock_wait_for_member
+    ):
+        mock_get_status.return_value = make_status()
+        mock_wait_for_member.return_value = False
+        operation = Mock()
+
+        with self.assertRaises(RuntimeError):
+            rolling_apply("mongodb://replica", operation)
+
+        # Assertions
+        operation.assert_called_once_with("mongodb-1:27017")
+        mock_step_down.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()